@@ -0,0 +1,164 @@
+import os
+import queue
+import struct
+import threading
+from puzzle_library import pack_game, unpack_game
+
+# Autosave = snapshot + journal, both tagged with a generation number:
+#   session.snap    : SNAPSHOT header then one pack_game record
+#   session.journal : JOURNAL header then RECORD per change, replayed over the snapshot of the same generation
+# A snapshot is written to a temporary file and renamed over the old one, then a fresh journal replaces the
+# old one the same way, so a crash at any point leaves a snapshot and a journal that is either its own or stale.
+DEFAULT_AUTOSAVE_DIR = os.path.join(os.path.expanduser("~"), ".sudoku_tkinter", "autosave")
+SNAPSHOT = struct.Struct("<4sIBB")  # Magic, generation, grid size, mini grid size
+JOURNAL = struct.Struct("<4sI")  # Magic, generation
+RECORD = struct.Struct("<HHH")  # Cell, number, 1 = read-only (cell HINTS: hint count, max hints, which can pass 255)
+SNAPSHOT_MAGIC, JOURNAL_MAGIC = b"SDS2", b"SDJ2"  # Autosaves with byte-sized hint counts (SDKS/SDKJ) are not offered
+HINTS = 0xFFFF
+
+def _write_atomic(path, data):
+    # Write, fsync, then rename over path
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+class AutosaveJournal:
+    # Append-only autosave: the Tk thread only queues small records, a writer thread appends them
+    # and fsyncs once per flush_interval, and a new snapshot is taken every compact_every records
+    def __init__(self, directory=DEFAULT_AUTOSAVE_DIR, flush_interval=1.0, compact_every=256):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, "session.snap")
+        self.journal_path = os.path.join(directory, "session.journal")
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.generation = self._stored_generation()  # New snapshots never reuse the number of a stale journal
+        self.records = 0  # Records queued since the last snapshot
+        self.discarded = False  # The game ended, nothing is journaled until the next snapshot
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def _stored_generation(self):
+        generation = 0
+        for path, header in ((self.snapshot_path, SNAPSHOT), (self.journal_path, JOURNAL)):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read(header.size)
+            except FileNotFoundError:
+                continue
+            if (len(data) == header.size):
+                generation = max(generation, header.unpack(data)[1])
+        return generation
+
+    def start(self):
+        if (self.thread is None):
+            self.thread = threading.Thread(target=self._writer, daemon=True)
+            self.thread.start()
+
+    def close(self):
+        # Write everything still queued and stop the writer
+        if (self.thread is not None):
+            self.queue.put(("stop",))
+            self.thread.join()
+            self.thread = None
+
+    def snapshot(self, game):
+        # Start over from the whole game (new game, load, or compaction)
+        self.generation += 1
+        self.records = 0
+        self.discarded = False
+        board = game.board
+        header = SNAPSHOT.pack(SNAPSHOT_MAGIC, self.generation, board.grid_size, board.mini_grid_size)
+        self.queue.put(("snapshot", self.generation, header + pack_game(game)))
+
+    def record_cell(self, board, i):
+        # Current state of one cell
+        if (self.discarded):
+            return
+        self.queue.put(("record", RECORD.pack(i, board.cells[i], 1 - board.editable[i])))
+        self.records += 1
+
+    def record_hints(self, hint_count, max_hint):
+        if (self.discarded):
+            return
+        self.queue.put(("record", RECORD.pack(HINTS, hint_count, max_hint)))
+        self.records += 1
+
+    def needs_compaction(self):
+        return self.records >= self.compact_every
+
+    def discard(self):
+        # The game is over, nothing to restore
+        self.discarded = True
+        self.records = 0
+        self.queue.put(("discard",))
+
+    def _writer(self):
+        pending = []
+        journal = None
+        while True:
+            try:
+                message = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                message = ("flush",)
+            kind = message[0]
+            if (kind == "record"):
+                pending.append(message[1])
+                continue
+            if (kind in ("snapshot", "discard")):
+                pending = []  # Already part of the new snapshot, or no longer wanted
+                if (journal is not None):
+                    journal.close()
+                    journal = None
+                if (kind == "discard"):
+                    for path in (self.snapshot_path, self.journal_path):
+                        if (os.path.exists(path)):
+                            os.remove(path)
+                    continue
+                os.makedirs(self.directory, exist_ok=True)
+                _write_atomic(self.snapshot_path, message[2])
+                _write_atomic(self.journal_path, JOURNAL.pack(JOURNAL_MAGIC, message[1]))
+                journal = open(self.journal_path, "ab")
+                continue
+            # Timer tick or stop: one write and one fsync for everything queued since the last tick
+            if (pending and journal is not None):
+                journal.write(b"".join(pending))
+                journal.flush()
+                os.fsync(journal.fileno())
+            pending = []
+            if (kind == "stop"):
+                if (journal is not None):
+                    journal.close()
+                return
+
+    def recover(self):
+        # The last session as a SavedGame (snapshot plus its journal), None when there is none
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if (len(data) < SNAPSHOT.size):
+            return None
+        magic, generation, grid_size, mini_grid_size = SNAPSHOT.unpack_from(data)
+        if (magic != SNAPSHOT_MAGIC):
+            return None
+        game = unpack_game(data[SNAPSHOT.size:], grid_size, mini_grid_size)
+        try:
+            with open(self.journal_path, "rb") as f:
+                journal = f.read()
+        except FileNotFoundError:
+            journal = b""
+        if (len(journal) >= JOURNAL.size and JOURNAL.unpack_from(journal) == (JOURNAL_MAGIC, generation)):
+            board = game.board
+            end = JOURNAL.size + (len(journal) - JOURNAL.size) // RECORD.size * RECORD.size  # Drop a torn last record
+            for i, num, read_only in RECORD.iter_unpack(journal[JOURNAL.size:end]):
+                if (i == HINTS):
+                    game.hint_count, game.max_hint = num, read_only
+                elif (i < board.cell_count and num <= board.grid_size):
+                    board.cells[i] = num
+                    board.editable[i] = 1 - read_only
+            board.recount()
+            board.take_dirty()
+        return game
@@ -0,0 +1,91 @@
+import argparse
+import math
+import sys
+from puzzle_formats import read_puzzles
+from sudoku_geometry import box_height
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only this module needs it
+    np = None
+
+class BatchResult:
+    # Per-board outcome of validate_boards, every field is a length M array
+    __slots__ = ("valid", "correct", "givens_kept")
+
+    def __init__(self, valid, correct, givens_kept):
+        self.valid = valid  # Complete and no number repeated in any row, column or box
+        self.correct = correct  # Cells equal to the answer (cells that are not givens when puzzles are passed), None without answers
+        self.givens_kept = givens_kept  # Every given of the puzzle is unchanged, None without puzzles
+
+    def __repr__(self):
+        return f"BatchResult(boards={len(self.valid)}, valid={int(self.valid.sum())})"
+
+def _require_numpy():
+    if (np is None):
+        raise ImportError("batch validation needs numpy (pip install numpy)")
+
+def _unit_ok(bits, full, axis):
+    # OR of one bit per number along axis equals the full mask only when each number appears once
+    return np.bitwise_or.reduce(bits, axis=axis) == full
+
+def validate_boards(boards, answers=None, puzzles=None, mini_grid_size=None):
+    # Check M boards at once: boards, answers and puzzles are (M, N, N) integer arrays ((N, N) is broadcast), 0 = empty
+    _require_numpy()
+    boards = np.asarray(boards)
+    if (boards.ndim == 2):
+        boards = boards[np.newaxis]
+    count, size = boards.shape[0], boards.shape[1]
+    height = mini_grid_size or box_height(size)
+    width = size // height
+    full = (1 << size) - 1
+    # Number -> its bit through a lookup table (0 and anything above size map to no bit)
+    table = np.array([0] + [1 << (num - 1) for num in range(1, size + 1)] + [0], dtype=np.int64 if size > 31 else np.int32)
+    bits = table[np.clip(boards, 0, size + 1)]
+    boxes = bits.reshape(count, size // height, height, size // width, width).transpose(0, 1, 3, 2, 4).reshape(count, size, size)
+    valid = (_unit_ok(bits, full, 2).all(axis=1) & _unit_ok(bits, full, 1).all(axis=1)
+             & _unit_ok(boxes, full, 2).all(axis=1))
+    correct = givens_kept = None
+    if (puzzles is not None):
+        puzzles = np.broadcast_to(np.asarray(puzzles), boards.shape)
+        givens_kept = ((puzzles == 0) | (boards == puzzles)).all(axis=(1, 2))
+    if (answers is not None):
+        matches = boards == np.broadcast_to(np.asarray(answers), boards.shape)
+        if (puzzles is not None):
+            matches &= puzzles == 0
+        correct = matches.sum(axis=(1, 2))
+    return BatchResult(valid, correct, givens_kept)
+
+def load_pack(source):
+    # (puzzles, solutions) arrays of a puzzle-per-line pack, only puzzles of the first grid size and with a solution
+    _require_numpy()
+    puzzles, solutions = [], []
+    for puzzle, solution in read_puzzles(source):
+        if (solution is None or (puzzles and len(puzzle) != len(puzzles[0]))):
+            continue
+        puzzles.append(puzzle)
+        solutions.append(solution)
+    if (not puzzles):
+        return None, None
+    size = math.isqrt(len(puzzles[0]))
+    return (np.array(puzzles, dtype=np.uint8).reshape(-1, size, size),
+            np.array(solutions, dtype=np.uint8).reshape(-1, size, size))
+
+def main(argv=None):
+    # QA a pack: every solution must be a valid grid that keeps its puzzle's givens
+    parser = argparse.ArgumentParser(description="Validate the solutions of a puzzle pack in one vectorized pass.")
+    parser.add_argument("pack", help="puzzle-per-line file with solutions (plain or gzip)")
+    args = parser.parse_args(argv)
+    puzzles, solutions = load_pack(args.pack)
+    if (puzzles is None):
+        print("no puzzles with solutions found", file=sys.stderr)
+        return 1
+    result = validate_boards(solutions, puzzles=puzzles)
+    bad = np.flatnonzero(~(result.valid & result.givens_kept))
+    print(f"{len(puzzles)} puzzles, {int(result.valid.sum())} valid solutions, {int(result.givens_kept.sum())} keep their givens")
+    for index in bad[:20]:
+        print(f"  puzzle {index + 1}: {'invalid' if not result.valid[index] else 'givens changed'}")
+    return 1 if len(bad) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from puzzle_library import SavedGame, save_game_file, load_game_file
+from sudoku_model import SudokuBoard, GRID_SIZES, difficulty_ranges, puzzle_board
+from sudoku_solver import SudokuSolver
+
+DIFFICULTIES = ["Easy", "Medium", "Hard", "Extreme"]
+OPERATIONS = ["fill_grid", "remove_numbers", "solve", "check_win", "update_progress", "save_game", "load_game"]
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile of an already sorted list
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def measure(run, repeats, memory=True):
+    # Time run() repeats times, then once more under tracemalloc for the peak memory
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    total = sum(times)
+    result = {"runs": repeats,
+              "mean_ms": total / repeats * 1000,
+              "p50_ms": percentile(times, 50) * 1000,
+              "p90_ms": percentile(times, 90) * 1000,
+              "p99_ms": percentile(times, 99) * 1000,
+              "max_ms": times[-1] * 1000,
+              "ops_per_s": repeats / total if total else None}
+    if (memory):
+        tracemalloc.start()
+        run()
+        result["peak_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+class BenchmarkCase:
+    # State shared by the operations of one (grid size, difficulty): every RNG is seeded from these
+    def __init__(self, grid_size, difficulty, seed, directory):
+        self.grid_size = grid_size
+        self.mini_grid_size = GRID_SIZES[grid_size]
+        self.difficulty = difficulty
+        self.remove_range = dict(difficulty_ranges(grid_size))[difficulty]
+        self.seed = f"{seed}-{grid_size}-{difficulty}"
+        self.rng = random.Random(self.seed)
+        self.directory = directory
+        board = SudokuBoard(grid_size, self.mini_grid_size)
+        board.fill_grid(self.rng)
+        self.solution = list(board.cells)
+        board.store_answers()
+        board.remove_numbers(self.rng.randint(*self.remove_range), self.rng, unique=True)
+        self.puzzle = list(board.cells)
+        self.solver = SudokuSolver(grid_size, self.mini_grid_size)
+        self.board = puzzle_board(self.puzzle, self.solution)
+        self.empty = [i for i in range(board.cell_count) if self.puzzle[i] == 0]
+
+    def fill_grid(self):
+        SudokuBoard(self.grid_size, self.mini_grid_size).fill_grid(self.rng)
+
+    def remove_numbers(self):
+        board = SudokuBoard(self.grid_size, self.mini_grid_size)
+        board.load_cells(self.solution)
+        board.store_answers()
+        board.remove_numbers(self.rng.randint(*self.remove_range), self.rng, unique=True)
+
+    def solve(self):
+        self.solver.solve(self.puzzle)
+
+    def check_win(self):
+        # Fill the board with the answer cell by cell, checking for a win after each input like the game does
+        board = puzzle_board(self.puzzle, self.solution)
+        for i in self.empty:
+            board.set(i // self.grid_size, i % self.grid_size, self.solution[i])
+            board.check_win()
+
+    def update_progress(self):
+        # One typed number followed by the progress calculation of SudokuGame.update_progress
+        i = self.rng.choice(self.empty)
+        self.board.set(i // self.grid_size, i % self.grid_size, self.rng.randint(0, self.grid_size))
+        self.board.count_correct() / len(self.empty) * 100
+
+    def save_game(self, extension):
+        save_game_file(os.path.join(self.directory, "bench" + extension), SavedGame(self.board, 0, 3, len(self.empty)))
+
+    def load_game(self, extension):
+        load_game_file(os.path.join(self.directory, "bench" + extension))
+
+def run_case(case, operations, repeats, memory):
+    # Yield one result per operation (and per save format for save/load)
+    def record(operation, run, count=repeats, **extra):
+        result = {"operation": operation, "grid_size": case.grid_size, "difficulty": case.difficulty, **extra}
+        case.rng = random.Random(f"{case.seed}-{operation}")  # Same inputs whichever operations are selected
+        result.update(measure(run, count, memory))
+        return result
+    if ("fill_grid" in operations):
+        yield record("fill_grid", case.fill_grid)
+    if ("remove_numbers" in operations):
+        yield record("remove_numbers", case.remove_numbers)
+    if ("solve" in operations):
+        yield record("solve", case.solve)
+    if ("check_win" in operations):
+        yield record("check_win", case.check_win)
+    if ("update_progress" in operations):
+        yield record("update_progress", case.update_progress, repeats * 100)
+    for extension in (".dat", ".sdb"):
+        if ("save_game" in operations or "load_game" in operations):
+            case.save_game(extension)  # Load needs the file even when save is not measured
+        if ("save_game" in operations):
+            yield record("save_game", lambda: case.save_game(extension), format=extension)
+        if ("load_game" in operations):
+            yield record("load_game", lambda: case.load_game(extension), format=extension)
+
+def result_key(result):
+    return (result["operation"], result["grid_size"], result["difficulty"], result.get("format"))
+
+def compare(results, baseline_path, threshold):
+    # Print p50 ratios against a previous run, returns the slower-than-threshold results
+    with open(baseline_path) as f:
+        baseline = {result_key(result): result for result in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        old = baseline.get(result_key(result))
+        if (old is None or not old["p50_ms"]):
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"]
+        flag = ""
+        if (ratio > threshold):
+            regressions.append(result)
+            flag = "  <-- slower"
+        print(f"{' '.join(str(part) for part in result_key(result) if part)}: {old['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms (x{ratio:.2f}){flag}")
+    return regressions
+
+def main(argv=None):
+    # Headless, seeded benchmarks of the game's hot operations, saved as JSON
+    parser = argparse.ArgumentParser(description="Benchmark Sudoku generation, solving, checking and save files.")
+    parser.add_argument("-s", "--size", type=int, nargs="+", choices=sorted(GRID_SIZES), default=[4, 9, 16, 25], help="grid sizes")
+    parser.add_argument("-d", "--difficulty", nargs="+", choices=DIFFICULTIES, default=DIFFICULTIES, help="difficulty bands")
+    parser.add_argument("--ops", nargs="+", choices=OPERATIONS, default=OPERATIONS, help="operations to measure")
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="timed runs per operation")
+    parser.add_argument("--seed", type=int, default=0, help="base seed, the same seed measures the same boards")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON results file")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="p50 ratio reported as a regression")
+    args = parser.parse_args(argv)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for grid_size in args.size:
+            for difficulty in args.difficulty:
+                case = BenchmarkCase(grid_size, difficulty, args.seed, directory)
+                for result in run_case(case, args.ops, args.repeats, not args.no_memory):
+                    results.append(result)
+                    name = " ".join(str(part) for part in result_key(result) if part)
+                    print(f"{name}: p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms", file=sys.stderr)
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": args.seed,
+                       "repeats": args.repeats, "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"{len(results)} results -> {args.output}", file=sys.stderr)
+    if (args.compare):
+        if (compare(results, args.compare, args.threshold)):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
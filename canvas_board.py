@@ -0,0 +1,101 @@
+import time
+import tkinter as tk
+
+# Keys that move between cells: keysym -> (row step, col step)
+NAVIGATION_KEYS = {"Up": (-1, 0), "Down": (1, 0), "Left": (0, -1), "Right": (0, 1),
+                   "w": (-1, 0), "s": (1, 0), "a": (0, -1), "d": (0, 1),
+                   "W": (-1, 0), "S": (1, 0), "A": (0, -1), "D": (0, 1)}
+MAX_GRID_SIDE = 900  # Pixels, cells get smaller above this
+
+class CanvasGrid:
+    # The whole board on one tk.Canvas: a rectangle and a text item per cell.
+    # Only items of changed cells are reconfigured, so Tk redraws just those cells' rectangles
+    def __init__(self, parent, grid_size, mini_grid_size, font_size, grid_gap, on_input):
+        self.grid_size = grid_size
+        self.mini_grid_size = mini_grid_size  # Rows per box
+        self.box_width = grid_size // mini_grid_size  # Columns per box
+        self.on_input = on_input  # Called with (row, col, number) when the player types (0 = cleared)
+        self.cell_size = min(font_size * 3 + 10, MAX_GRID_SIDE // grid_size)  # Big grids shrink to stay on screen
+        self.margin = grid_gap
+        side = self.cell_size * grid_size + 2 * self.margin
+        self.canvas = tk.Canvas(parent, width=side, height=side, highlightthickness=0, takefocus=1, bg="black")
+        self.font = ("Arial", min(font_size + 8, self.cell_size // 2))
+        self.rects, self.texts = [], []
+        for i in range(grid_size * grid_size):
+            x0, y0, x1, y1 = self.cell_box(i)
+            self.rects.append(self.canvas.create_rectangle(x0, y0, x1, y1, outline="black", width=1))
+            self.texts.append(self.canvas.create_text((x0 + x1) / 2, (y0 + y1) / 2, text="", font=self.font))
+        for k in range(0, grid_size + 1, mini_grid_size):
+            # Thick block borders
+            offset = self.margin + k * self.cell_size
+            self.canvas.create_line(self.margin, offset, side - self.margin, offset, width=grid_gap)
+        for k in range(0, grid_size + 1, self.box_width):
+            offset = self.margin + k * self.cell_size
+            self.canvas.create_line(offset, self.margin, offset, side - self.margin, width=grid_gap)
+        self.selection = self.canvas.create_rectangle(0, 0, 0, 0, outline="red", width=3, state="hidden")
+        self.selected = None
+        self.shown = [0] * (grid_size * grid_size)  # Number drawn in each cell
+        self.locked = [0] * (grid_size * grid_size)  # 1 = read-only cell
+        self.conflict = [False] * (grid_size * grid_size)  # True = number repeated in its row, column or box
+        self.conflict_color = "red"
+        self.typed, self.typed_at = 0, 0  # Digits typed so far, for numbers above 9
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Key>", self.on_key)
+
+    def cell_box(self, i):
+        row, col = divmod(i, self.grid_size)
+        x0, y0 = self.margin + col * self.cell_size, self.margin + row * self.cell_size
+        return x0, y0, x0 + self.cell_size, y0 + self.cell_size
+
+    def recolor(self, primary_color, secondary_color):
+        # Alternate colors based on blocks
+        for i, rect in enumerate(self.rects):
+            row, col = divmod(i, self.grid_size)
+            self.canvas.itemconfig(rect, fill=primary_color if (row // self.mini_grid_size + col // self.box_width) % 2 == 0 else secondary_color)
+
+    def update_cell(self, i, num, locked, conflict=False):
+        # Redraw one cell when it changed
+        if (self.shown[i] == num and self.locked[i] == locked and self.conflict[i] == conflict):
+            return
+        color = self.conflict_color if conflict else "black" if locked else "blue"
+        self.canvas.itemconfig(self.texts[i], text=str(num) if num else "", fill=color)
+        self.shown[i], self.locked[i], self.conflict[i] = num, locked, conflict
+
+    def select(self, row, col):
+        # Move the keyboard cursor
+        if (0 <= row < self.grid_size and 0 <= col < self.grid_size):
+            self.selected = (row, col)
+            self.typed = 0
+            self.canvas.coords(self.selection, *self.cell_box(row * self.grid_size + col))
+            self.canvas.itemconfig(self.selection, state="normal")
+            self.canvas.tag_raise(self.selection)
+            self.canvas.focus_set()
+
+    def on_click(self, event):
+        col = int((event.x - self.margin) // self.cell_size)
+        row = int((event.y - self.margin) // self.cell_size)
+        self.select(row, col)
+
+    def on_key(self, event):
+        # Single key handler for navigation and editing
+        if (self.selected is None):
+            return
+        row, col = self.selected
+        if (event.keysym in NAVIGATION_KEYS):
+            direction = NAVIGATION_KEYS[event.keysym]
+            self.select(row + direction[0], col + direction[1])
+            return
+        if (self.locked[row * self.grid_size + col]):
+            return
+        if (event.keysym in ("BackSpace", "Delete")):
+            self.typed = 0
+            self.on_input(row, col, 0)
+        elif (event.char.isdigit()):
+            # A second digit typed within a second extends the number (1 then 2 = 12) while it fits
+            now = time.monotonic()
+            num = self.typed * 10 + int(event.char) if (now - self.typed_at < 1) else int(event.char)
+            if (not 1 <= num <= self.grid_size):
+                num = int(event.char)
+            self.typed, self.typed_at = num, now
+            if (1 <= num <= self.grid_size):
+                self.on_input(row, col, num)
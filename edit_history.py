@@ -0,0 +1,76 @@
+from array import array
+
+class EditHistory:
+    # Undo/redo log of cell changes. Each change is one packed integer (cell << 16 | old << 8 | new),
+    # with a copy of the cells every checkpoint_every changes so jumping anywhere replays at most that many
+    def __init__(self, board, checkpoint_every=64):
+        self.board = board
+        self.checkpoint_every = checkpoint_every
+        self.deltas = array("I")
+        self.position = 0  # Changes before this are applied, the rest can be redone
+        self.checkpoints = {0: array("B", board.cells)}  # Position -> cells at that point
+
+    @staticmethod
+    def unpack(delta):
+        return delta >> 16, (delta >> 8) & 0xFF, delta & 0xFF
+
+    def record(self, i, old, new):
+        # Add a change made by the player (after the board has it, checkpoints copy the cells), dropping whatever could still be redone
+        if (old == new):
+            return
+        if (self.position < len(self.deltas)):
+            del self.deltas[self.position:]
+            for position in [position for position in self.checkpoints if position > self.position]:
+                del self.checkpoints[position]
+        self.deltas.append(i << 16 | old << 8 | new)
+        self.position += 1
+        if (self.position % self.checkpoint_every == 0):
+            self.checkpoints[self.position] = array("B", self.board.cells)
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.deltas)
+
+    def _apply(self, i, num):
+        # Cells locked since (by a hint) keep their number
+        size = self.board.grid_size
+        if (self.board.is_editable(i // size, i % size)):
+            self.board.set(i // size, i % size, num)
+
+    def undo(self):
+        # Step back one change, returns the cell index or None
+        if (not self.can_undo()):
+            return None
+        self.position -= 1
+        i, old, _ = self.unpack(self.deltas[self.position])
+        self._apply(i, old)
+        return i
+
+    def redo(self):
+        if (not self.can_redo()):
+            return None
+        i, _, new = self.unpack(self.deltas[self.position])
+        self.position += 1
+        self._apply(i, new)
+        return i
+
+    def goto(self, position):
+        # Jump to any point: restore the nearest checkpoint at or before it and replay the rest
+        position = max(0, min(position, len(self.deltas)))
+        start = position - position % self.checkpoint_every
+        while start not in self.checkpoints:
+            start -= self.checkpoint_every
+        snapshot = self.checkpoints[start]
+        for i in range(self.board.cell_count):
+            if (self.board.cells[i] != snapshot[i]):
+                self._apply(i, snapshot[i])
+        for delta in self.deltas[start:position]:
+            i, _, new = self.unpack(delta)
+            self._apply(i, new)
+        self.position = position
+
+    def deltas_since(self, position):
+        # Changes after position as (cell, old, new), for appending to a journal
+        return [self.unpack(delta) for delta in self.deltas[position:self.position]]
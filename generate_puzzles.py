@@ -0,0 +1,114 @@
+import argparse
+from collections import deque
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from puzzle_cache import CanonicalCache
+from puzzle_formats import write_puzzles
+from sudoku_generator import SudokuGenerator
+from sudoku_grader import SudokuGrader
+from sudoku_model import GRID_SIZES, difficulty_ranges
+
+def generate_batch(grid_size, difficulty, seed, start, count, grade=None):
+    # Worker: generate puzzles start .. start + count - 1, each with its own seeded RNG
+    # so the output only depends on (seed, index) and not on how work was split.
+    # With grade, puzzles the technique grader rates differently are dropped
+    remove_range = dict(difficulty_ranges(grid_size))[difficulty]
+    grader = SudokuGrader(grid_size, GRID_SIZES[grid_size]) if grade else None
+    puzzles = []
+    for index in range(start, start + count):
+        rng = random.Random(seed * 1_000_003 + index)
+        generator = SudokuGenerator(grid_size, GRID_SIZES[grid_size], rng)
+        puzzle, solution = generator.generate(rng.randint(*remove_range))
+        if (grader is None or grader.grade(puzzle).difficulty == grade):
+            puzzles.append((puzzle, solution))
+    return puzzles
+
+def write_numbers(path, puzzles):
+    # "puzzle numbers | answer numbers" (0 = empty)
+    count = 0
+    with open(path, "w") as f:
+        for puzzle, solution in puzzles:
+            f.write(" ".join(map(str, puzzle)) + " | " + " ".join(map(str, solution)) + "\n")
+            count += 1
+    return count
+
+def main(argv=None):
+    # Generate puzzles without tkinter, one puzzle per line
+    parser = argparse.ArgumentParser(description="Generate a pack of Sudoku puzzles.")
+    parser.add_argument("-n", "--count", type=int, default=100, help="number of puzzles")
+    parser.add_argument("-s", "--size", type=int, choices=sorted(GRID_SIZES), default=9, help="grid size")
+    parser.add_argument("-d", "--difficulty", choices=["Easy", "Medium", "Hard", "Extreme", "Random"], default="Random")
+    parser.add_argument("-o", "--output", default="puzzles.txt", help="output file (.gz is compressed in line format)")
+    parser.add_argument("-f", "--format", choices=["numbers", "line"], default="numbers",
+                        help="numbers: 'puzzle | answer' as numbers, line: '..3.2..,solution' strings (.sdk writes grids)")
+    parser.add_argument("--no-solution", action="store_true", help="line format: write puzzles only")
+    parser.add_argument("-g", "--grade", choices=["Easy", "Medium", "Hard", "Extreme"],
+                        help="only keep puzzles the technique grader rates at this difficulty")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="base seed, the same seed gives the same pack")
+    parser.add_argument("--batch-size", type=int, default=64, help="puzzles per worker task")
+    parser.add_argument("--dedupe", metavar="CACHE", nargs="?", const="",
+                        help="drop puzzles equivalent (by symmetry) to one already in CACHE or in this pack, CACHE is then updated")
+    parser.add_argument("--max-generated", type=int,
+                        help="with --grade or --dedupe: give up after generating this many puzzles (default 1000 per puzzle asked for)")
+    args = parser.parse_args(argv)
+    filtered = args.grade is not None or args.dedupe is not None
+    max_generated = args.max_generated or (args.count * 1000 if filtered else args.count)
+    started = time.perf_counter()
+    cache = None if args.dedupe is None else CanonicalCache(args.dedupe or None)  # Without CACHE only this pack is checked
+    generated = other_grades = duplicates = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        def results():
+            # Batches are submitted a few ahead and taken in index order, so the file is written while workers run
+            # and the pack only depends on the seed. Dropped puzzles are made up by more batches until count are kept.
+            # Only about as many puzzles as are still missing (at the keep rate seen so far) are in flight,
+            # so a filter that keeps most puzzles does not generate thousands extra
+            nonlocal generated, other_grades, duplicates
+            kept, start, pending = 0, 0, deque()
+            while kept < args.count:
+                rate = (kept + 1) / (generated + 1)
+                while len(pending) < 2 * args.workers and start < max_generated:
+                    needed = (args.count - kept) / rate - sum(count for count, _ in pending)
+                    if (needed <= 0):
+                        break
+                    count = min(args.batch_size, max_generated - start, math.ceil(needed / args.workers))
+                    pending.append((count, executor.submit(generate_batch, args.size, args.difficulty, args.seed, start, count, args.grade)))
+                    start += count
+                if (not pending):
+                    break
+                count, future = pending.popleft()
+                batch = future.result()
+                generated += count
+                other_grades += count - len(batch)
+                for puzzle, solution in batch:
+                    if (kept >= args.count):
+                        break
+                    if (cache is None or cache.add(puzzle, solution)):
+                        kept += 1
+                        yield puzzle, solution
+                    else:
+                        duplicates += 1
+                print(f"\r{kept}/{args.count} puzzles ({generated} generated)", end="", file=sys.stderr)
+            for _, future in pending:
+                future.cancel()
+        if (args.format == "line"):
+            done = write_puzzles(args.output, results(), with_solution=not args.no_solution)
+        else:
+            done = write_numbers(args.output, results())
+    elapsed = time.perf_counter() - started
+    if (cache is not None):
+        cache.close()
+        print(f"\n{duplicates} duplicates dropped", end="", file=sys.stderr)
+    if (args.grade is not None):
+        print(f"\n{other_grades} puzzles rated other than {args.grade} dropped", end="", file=sys.stderr)
+    if (done < args.count):
+        print(f"\nOnly {done} of {args.count} puzzles kept after {generated} generated, raise --max-generated "
+              f"(a harder -d gives more Medium/Hard/Extreme grades)", end="", file=sys.stderr)
+    print(f"\n{done} puzzles in {elapsed:.2f}s ({done / elapsed:.1f}/s) -> {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+from sudoku_geometry import geometry
+from sudoku_techniques import FINDERS
+
+class HintEngine:
+    # Next easiest human deduction on a SudokuBoard. Candidates come from the board's
+    # incrementally kept unit masks, minus the eliminations found by earlier hints
+    def __init__(self, board):
+        self.board = board
+        self.grid_size = board.grid_size
+        self.cell_count = board.cell_count
+        self.geometry = geometry(board.grid_size, board.mini_grid_size)
+        self.units = self.geometry.units
+        self.cell_units = self.geometry.cell_units
+        self.eliminated = [0] * board.cell_count  # Candidates ruled out by elimination steps
+
+    def unit_name(self, unit):
+        size = self.grid_size
+        kind = ("Row", "Column", "Box")[unit // size]
+        return f"{kind} {unit % size + 1}"
+
+    def cell_name(self, i):
+        return f"row {i // self.grid_size + 1}, column {i % self.grid_size + 1}"
+
+    def candidates(self):
+        # Candidate bitmask of every cell (0 for filled cells)
+        cells, eliminated, candidates = self.board.cells, self.eliminated, self.board.candidates
+        return [0 if cells[i] else candidates(i) & ~eliminated[i] for i in range(self.cell_count)]
+
+    def pencil_marks(self, i):
+        # Candidate numbers of one cell, for pencil-mark display
+        if (self.board.cells[i]):
+            return []
+        mask = self.board.candidates(i) & ~self.eliminated[i]
+        return [num for num in range(1, self.grid_size + 1) if mask >> (num - 1) & 1]
+
+    def wrong_cells(self):
+        # Player numbers that differ from the answer (the deductions assume there are none)
+        board = self.board
+        return [i for i in range(self.cell_count)
+                if board.editable[i] and board.cells[i] and board.answers[i] and board.cells[i] != board.answers[i]]
+
+    def next_deduction(self):
+        # Easiest step available now, None when only guessing is left (or the board is contradictory)
+        cand = self.candidates()
+        cells = self.board.cells
+        if (any(not cand[i] and not cells[i] for i in range(self.cell_count))):
+            return None
+        for _, finder in FINDERS:
+            deduction = next(finder(self.geometry, cand), None)
+            if (deduction is not None):
+                return deduction
+        return None
+
+    def apply(self, deduction):
+        # Remember the eliminations of a step (placements are written to the board by the caller)
+        for i, num in deduction.eliminations:
+            self.eliminated[i] |= 1 << (num - 1)
+
+    def next_placement(self, max_steps=200):
+        # Apply elimination steps until a number can be placed, returns (placement, steps that led to it)
+        steps = []
+        while len(steps) < max_steps:
+            deduction = self.next_deduction()
+            if (deduction is None):
+                return None, steps
+            if (deduction.cell is not None):
+                return deduction, steps
+            self.apply(deduction)
+            steps.append(deduction)
+        return None, steps
+
+    def explain(self, deduction):
+        # One sentence for the player
+        names = ", ".join(str(num) for num in deduction.numbers)
+        where = self.unit_name(deduction.unit) if deduction.unit is not None else ""
+        if (deduction.technique == "Naked single"):
+            return f"Naked single: {deduction.number} is the only number left for {self.cell_name(deduction.cell)}."
+        if (deduction.technique == "Hidden single"):
+            return f"Hidden single: {deduction.number} fits nowhere else in {where}, so it goes at {self.cell_name(deduction.cell)}."
+        removed = len(deduction.eliminations)
+        return f"{deduction.technique} on {names} in {where}: removes {removed} candidate{'s' if removed != 1 else ''}."
@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from benchmark import percentile
+from puzzle_formats import format_line
+from sudoku_generator import SudokuGenerator
+from sudoku_model import GRID_SIZES
+
+# Load test for puzzle_service: many keep-alive connections send a weighted mix of requests built
+# from a seeded set of puzzles (repeats exercise the cache and request sharing), then prints per-endpoint
+# latency percentiles and throughput. Exit status 1 when any request failed.
+DEFAULT_MIX = "solve=5,validate=3,hint=2,grade=1,generate=1"
+
+def make_games(grid_size, seed, count):
+    # (puzzle, half-filled board, solution) lines, the same for the same seed
+    rng = random.Random(seed)
+    games = []
+    for index in range(count):
+        generator = SudokuGenerator(grid_size, GRID_SIZES[grid_size], random.Random(seed * 1_000_003 + index))
+        puzzle, solution = generator.generate(grid_size * grid_size // 2)
+        board = list(puzzle)
+        for i in rng.sample([i for i in range(len(board)) if not board[i]], puzzle.count(0) // 2):
+            board[i] = solution[i]  # Half filled in by a "player"
+        games.append((format_line(puzzle), format_line(board), format_line(solution)))
+    return games
+
+def request_body(path, games, rng, grid_size):
+    puzzle, board, solution = rng.choice(games)
+    if (path == "/generate"):
+        return {"size": grid_size, "difficulty": rng.choice(["Easy", "Medium", "Hard"]), "seed": rng.randrange(64)}
+    if (path in ("/solve", "/grade")):
+        return {"puzzle": puzzle}
+    if (path == "/validate"):
+        return {"board": rng.choice([board, solution]), "puzzle": puzzle}
+    return {"board": board, "puzzle": puzzle}
+
+async def send(reader, writer, host, path, body):
+    # One keep-alive request, returns (status, response)
+    data = json.dumps(body).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if (line in (b"\r\n", b"")):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if (name.strip().lower() == "content-length"):
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def client(host, port, jobs, results):
+    # One connection working through the shared job queue
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while jobs:
+            path, body = jobs.pop()
+            started = time.perf_counter()
+            try:
+                status, _ = await send(reader, writer, host, path, body)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                status = 0
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+            results.append((path, status, time.perf_counter() - started))
+    finally:
+        writer.close()
+
+async def wait_ready(host, port, timeout):
+    # Until the service accepts connections (used with --spawn)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if (time.monotonic() > deadline):
+                raise
+            await asyncio.sleep(0.1)
+
+async def run(args):
+    weights = {}
+    for part in args.mix.split(","):
+        path, _, weight = part.partition("=")
+        weights["/" + path.strip()] = float(weight or 1)
+    rng = random.Random(args.seed)
+    games = make_games(args.size, args.seed, args.puzzles)
+    paths = rng.choices(list(weights), weights=list(weights.values()), k=args.requests)
+    jobs = [(path, request_body(path, games, rng, args.size)) for path in paths]
+    jobs.reverse()  # pop() then takes them in order
+    results = []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(args.host, args.port, jobs, results) for _ in range(args.concurrency)))
+    return results, time.perf_counter() - started
+
+def main(argv=None):
+    # Drive a running puzzle_service (or start one with --spawn) and report latencies
+    parser = argparse.ArgumentParser(description="Load test the puzzle service with concurrent keep-alive clients.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8765)
+    parser.add_argument("-c", "--concurrency", type=int, default=200, help="open connections")
+    parser.add_argument("-n", "--requests", type=int, default=5000, help="requests in total")
+    parser.add_argument("-s", "--size", type=int, choices=sorted(GRID_SIZES), default=9, help="grid size")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight list")
+    parser.add_argument("--puzzles", type=int, default=200, help="distinct puzzles the requests are drawn from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="start puzzle_service.py for the run")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="with --spawn: service worker processes")
+    parser.add_argument("-o", "--output", help="write the summary as JSON")
+    args = parser.parse_args(argv)
+    service = None
+    if (args.spawn):
+        service = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzle_service.py"),
+                                    "--host", args.host, "--port", str(args.port), "--workers", str(args.workers)])
+    try:
+        if (service is not None):
+            asyncio.run(wait_ready(args.host, args.port, 30))
+        results, elapsed = asyncio.run(run(args))
+    finally:
+        if (service is not None):
+            service.terminate()
+            service.wait()
+    summary = {"requests": len(results), "seconds": elapsed, "requests_per_s": len(results) / elapsed,
+               "concurrency": args.concurrency, "failed": sum(1 for _, status, _ in results if status != 200), "endpoints": {}}
+    print(f"{len(results)} requests in {elapsed:.2f}s ({summary['requests_per_s']:.0f}/s), "
+          f"{args.concurrency} connections, {summary['failed']} failed", file=sys.stderr)
+    for path in sorted({path for path, _, _ in results}):
+        times = sorted(seconds for p, _, seconds in results if p == path)
+        summary["endpoints"][path] = endpoint = {"count": len(times), "p50_ms": percentile(times, 50) * 1000,
+                                                 "p90_ms": percentile(times, 90) * 1000, "p99_ms": percentile(times, 99) * 1000,
+                                                 "max_ms": times[-1] * 1000}
+        print(f"  {path:<10} {len(times):>6}  p50 {endpoint['p50_ms']:8.2f} ms  p90 {endpoint['p90_ms']:8.2f} ms  "
+              f"p99 {endpoint['p99_ms']:8.2f} ms  max {endpoint['max_ms']:8.2f} ms", file=sys.stderr)
+    if (args.output):
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=1)
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
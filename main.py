@@ -1,5 +1,8 @@
+import time
+started = time.perf_counter()
 import tkinter as tk
 from sudoku_board import SudokuGame
+from perf_monitor import monitor
 
 def main(game):
     # Main function of Sudoku game
@@ -11,9 +14,12 @@ def main(game):
     bottom_frame.pack(side="bottom", padx=15, pady=(0, 25), anchor="center")
     game.top_frame = top_frame
     game.bottom_frame = bottom_frame
-    game.create_grid(top_frame) # Show Sudoku grid
     game.create_progress_bar(bottom_frame) # Show progress bar
     game.show_game_buttons(bottom_frame) # Show buttons  
+    root.update() # Show the window before the N x N grid is built
+    game.start_session() # Continue the last game if it was not finished, else show an empty grid
+    if (monitor.enabled):
+        monitor.record("startup", time.perf_counter() - started) # Cold start to interactive (F12 window)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -21,6 +27,10 @@ if __name__ == "__main__":
     root.geometry("%dx%d+0+0" % (w, h))
     root.resizable(False, False)
     root.title("SudokuGame")
+    if (monitor.enabled):
+        # SUDOKU_PERF=1: count widget calls, F12 toggles the performance window
+        monitor.install_tk(root)
+        root.bind("<F12>", lambda event: monitor.show_overlay(root))
     game = SudokuGame(root)
     main(game)
     root.mainloop()
@@ -0,0 +1,190 @@
+from collections import deque
+import contextlib
+import functools
+import io
+import os
+import sys
+import threading
+import time
+
+PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".sudoku_tkinter", "profiles")
+
+class RollingHistogram:
+    # Last window samples for percentiles plus totals since the start, memory stays bounded
+    def __init__(self, window=512):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        if (value > self.max):
+            self.max = value
+
+    def percentile(self, q):
+        if (not self.samples):
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def summary(self):
+        return {"count": self.count, "mean": self.total / self.count if self.count else 0.0,
+                "p50": self.percentile(50), "p90": self.percentile(90), "p99": self.percentile(99), "max": self.max}
+
+class CountingTk:
+    # Stands in for root.tk and counts every Tcl call made by the widgets created after it is installed
+    def __init__(self, tk, monitor):
+        self._tk = tk
+        self._monitor = monitor
+
+    def call(self, *args):
+        self._monitor.tcl_calls += 1
+        return self._tk.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._tk, name)
+
+class PerfMonitor:
+    # Opt-in timing of the game's handlers (SUDOKU_PERF=1), a no-op check per call while disabled
+    def __init__(self, enabled=False, window=512):
+        self.enabled = enabled
+        self.window = window
+        self.timings = {}  # Name -> RollingHistogram of seconds
+        self.widget_calls = {}  # Name -> RollingHistogram of Tcl calls made during one call
+        self.tcl_calls = 0
+        self.profile_requested = False  # Capture the next new game with cProfile
+        self.profiler = None
+        self.thread_profilers = []
+        self.overlay = None
+        self.lock = threading.Lock()
+
+    def install_tk(self, root):
+        # Count Tcl calls, must run before any widget is created (widgets copy root.tk)
+        if (not isinstance(root.tk, CountingTk)):
+            root.tk = CountingTk(root.tk, self)
+
+    def record(self, name, seconds, calls=None):
+        with self.lock:
+            if (name not in self.timings):
+                self.timings[name] = RollingHistogram(self.window)
+                self.widget_calls[name] = RollingHistogram(self.window)
+            self.timings[name].add(seconds)
+            if (calls is not None):
+                self.widget_calls[name].add(calls)
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        # Time a block (Tcl calls are only counted on the Tk thread)
+        if (not self.enabled):
+            yield
+            return
+        is_main = threading.current_thread() is threading.main_thread()
+        calls = self.tcl_calls
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started, self.tcl_calls - calls if is_main else None)
+
+    def timed(self, name):
+        # Decorator version of measure
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if (not self.enabled):
+                    return func(*args, **kwargs)
+                with self.measure(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self.lock:
+            self.timings.clear()
+            self.widget_calls.clear()
+
+    def report(self):
+        # One line per timed name, slowest p99 first
+        with self.lock:
+            rows = [(name, histogram.summary(), self.widget_calls[name].summary()) for name, histogram in self.timings.items()]
+        rows.sort(key=lambda row: row[1]["p99"], reverse=True)
+        lines = [f"{'name':<18}{'count':>7}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'tcl/call':>9}"]
+        for name, timing, calls in rows:
+            tcl = f"{calls['mean']:.0f}" if calls["count"] else "-"
+            lines.append(f"{name:<18}{timing['count']:>7}{timing['p50'] * 1000:>9.2f}{timing['p99'] * 1000:>9.2f}"
+                         f"{timing['max'] * 1000:>9.2f}{tcl:>9}")
+        return "\n".join(lines)
+
+    def dump(self, file=None):
+        print(self.report(), file=file or sys.stderr)
+
+    def start_profile(self):
+        # Begin the requested cProfile capture on the Tk thread
+        if (not self.profile_requested or self.profiler is not None):
+            return
+        import cProfile  # Loaded only when a capture is asked for, it is slow to import
+        self.profile_requested = False
+        self.thread_profilers = []
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    @contextlib.contextmanager
+    def thread_profile(self):
+        # Profile a worker thread while a capture is running. Before 3.12 cProfile only sees its own thread.
+        # From 3.12 on it hooks sys.monitoring for the whole process: the capture already covers every thread,
+        # and enabling a second profiler raises ValueError
+        if (self.profiler is None or sys.version_info >= (3, 12)):
+            yield
+            return
+        import cProfile
+        profiler = cProfile.Profile()
+        self.thread_profilers.append(profiler)
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+    def stop_profile(self, directory=PROFILE_DIR):
+        # End the capture, save it for snakeviz/pstats and print the top entries, returns the file path
+        if (self.profiler is None):
+            return None
+        import pstats
+        self.profiler.disable()
+        stats = pstats.Stats(self.profiler, *self.thread_profilers)
+        self.profiler, self.thread_profilers = None, []
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime("new_game_%Y%m%d_%H%M%S.prof"))
+        stats.dump_stats(path)
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats("cumulative").print_stats(25)
+        print(text.getvalue(), file=sys.stderr)
+        return path
+
+    def show_overlay(self, root):
+        # Toggle a small window with the live numbers
+        import tkinter as tk
+        if (self.overlay is not None and self.overlay.winfo_exists()):
+            self.overlay.destroy()
+            return
+        self.overlay = overlay = tk.Toplevel(root)
+        overlay.title("Performance")
+        overlay.attributes("-topmost", True)
+        label = tk.Label(overlay, font=("Courier", 9), justify="left", anchor="nw")
+        label.pack(fill="both", expand=True, padx=5, pady=5)
+        buttons = tk.Frame(overlay)
+        buttons.pack(pady=5)
+        tk.Button(buttons, text="Dump log", command=self.dump).pack(side="left", padx=3)
+        tk.Button(buttons, text="Reset", command=self.reset).pack(side="left", padx=3)
+        tk.Button(buttons, text="Profile next new game", command=lambda: setattr(self, "profile_requested", True)).pack(side="left", padx=3)
+        def refresh():
+            if (overlay.winfo_exists()):
+                label.config(text=self.report() + ("\n\nProfiling the next new game..." if self.profile_requested else ""))
+                overlay.after(500, refresh)
+        refresh()
+
+monitor = PerfMonitor(enabled=os.environ.get("SUDOKU_PERF", "") not in ("", "0"))
@@ -0,0 +1,217 @@
+from array import array
+from itertools import permutations, product
+import math
+import os
+from puzzle_formats import parse_line, format_line
+from sudoku_geometry import box_height
+from sudoku_grader import SudokuGrader
+from sudoku_solver import SudokuSolver
+
+# Puzzles that are the same up to relabeling numbers, transposing, swapping bands/stacks and swapping
+# rows/columns inside a band/stack share one canonical form, the smallest grid reachable by those moves.
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".sudoku_tkinter", "canonical_cache.txt")
+
+def _rank(values):
+    # Replace each value by its position among the sorted distinct values (the same for equivalent grids)
+    order = {value: rank for rank, value in enumerate(sorted(set(values)))}
+    return [order[value] for value in values]
+
+def _transpose(cells, size):
+    return [cells[col * size + row] for row in range(size) for col in range(size)]
+
+def _refine(cells, size, height, width):
+    # Colors of rows and columns that no symmetry changes, split by their givens until stable
+    # (bands are height rows, stacks are width columns)
+    rows_of = [[(i % size, cells[i]) for i in range(row * size, (row + 1) * size) if cells[i]] for row in range(size)]
+    cols_of = [[(i // size, cells[i]) for i in range(col, size * size, size) if cells[i]] for col in range(size)]
+    row_color, col_color = _rank([len(givens) for givens in rows_of]), _rank([len(givens) for givens in cols_of])
+    classes = -1
+    while True:
+        band_color = _rank([tuple(sorted(row_color[band:band + height])) for band in range(0, size, height)])
+        stack_color = _rank([tuple(sorted(col_color[stack:stack + width])) for stack in range(0, size, width)])
+        digit_spots = {}
+        for row, givens in enumerate(rows_of):
+            for col, num in givens:
+                digit_spots.setdefault(num, []).append((row_color[row], col_color[col]))
+        digit_color = dict(zip(digit_spots, _rank([tuple(sorted(spots)) for spots in digit_spots.values()])))
+        row_color, col_color = (
+            _rank([(band_color[row // height], row_color[row], tuple(sorted((col_color[col], digit_color[num]) for col, num in rows_of[row])))
+                   for row in range(size)]),
+            _rank([(stack_color[col // width], col_color[col], tuple(sorted((row_color[row], digit_color[num]) for row, num in cols_of[col])))
+                   for col in range(size)]))
+        count = len(set(row_color)) + len(set(col_color))
+        if (count == classes):
+            return row_color, col_color
+        classes = count
+
+def _orders(color, block_size, limit):
+    # Line orders that sort blocks (block_size lines each), then the lines of each block, by color, with every order of tied items.
+    # Past limit orders only the first is kept: the result is then still equivalent but may miss a duplicate
+    def tied_groups(items, key):
+        groups = {}
+        for item in sorted(items, key=key):
+            groups.setdefault(key(item), []).append(item)
+        return list(groups.values())
+    def arrangements(groups, is_full):
+        if (not is_full):
+            return [tuple(item for group in groups for item in group)]
+        return [sum(choice, ()) for choice in product(*(permutations(group) for group in groups))]
+    blocks = range(len(color) // block_size)
+    block_color = [tuple(sorted(color[block * block_size:(block + 1) * block_size])) for block in blocks]
+    block_groups = tied_groups(blocks, lambda block: block_color[block])
+    line_groups = [tied_groups(range(block * block_size, (block + 1) * block_size), lambda line: color[line]) for block in blocks]
+    count = math.prod(math.factorial(len(group)) for groups in [block_groups] + line_groups for group in groups)
+    is_full = count <= limit
+    block_orders = arrangements(block_groups, is_full)
+    line_orders = [arrangements(groups, is_full) for groups in line_groups]
+    return [[line for block in blocks for line in within[block]] for blocks in block_orders for within in product(*line_orders)]
+
+def _relabel(cells, size, rows, cols, labels=None):
+    # Cells read in rows x cols order with numbers renamed by first appearance
+    labels = {} if labels is None else labels
+    out = bytearray(size * size)
+    k = 0
+    for row in rows:
+        base = row * size
+        for col in cols:
+            num = cells[base + col]
+            if (num):
+                num = labels.setdefault(num, len(labels) + 1)
+            out[k] = num
+            k += 1
+    return bytes(out), labels
+
+class CanonicalForm:
+    # The canonical key of a puzzle and the symmetry that produced it
+    __slots__ = ("key", "size", "transposed", "rows", "cols", "labels")
+
+    def __init__(self, key, size, transposed, rows, cols, labels):
+        self.key = key  # Canonical grid as bytes (0 = empty), equal for equivalent puzzles
+        self.size = size
+        self.transposed = transposed
+        self.rows, self.cols = rows, cols
+        self.labels = labels  # Original number -> canonical number
+
+    def apply(self, cells):
+        # Move another grid of the same puzzle (its solution) into canonical space
+        cells = _transpose(cells, self.size) if self.transposed else cells
+        return _relabel(cells, self.size, self.rows, self.cols, dict(self.labels))[0]
+
+    def invert(self, key_cells):
+        # Move a canonical grid back to the puzzle's own layout and numbers
+        size = self.size
+        numbers = {canonical: num for num, canonical in self.labels.items()}
+        unused = iter(sorted(set(range(1, size + 1)) - set(self.labels)))
+        for canonical in range(1, size + 1):
+            if (canonical not in numbers):
+                numbers[canonical] = next(unused)  # Numbers missing from the puzzle
+        cells = [0] * (size * size)
+        k = 0
+        for row in self.rows:
+            for col in self.cols:
+                num = key_cells[k]
+                cells[row * size + col] = numbers[num] if num else 0
+                k += 1
+        return array("B", _transpose(cells, size) if self.transposed else cells)
+
+def canonical_form(puzzle, limit=32):
+    # Smallest grid over every symmetric order of rows and columns (limit orders per axis).
+    # Transposing turns 2x3 boxes into 3x2 ones, so it is only a symmetry of square boxes
+    size = math.isqrt(len(puzzle))
+    height = box_height(size)
+    width = size // height
+    best = None
+    for transposed in ((False, True) if height == width else (False,)):
+        cells = _transpose(puzzle, size) if transposed else list(puzzle)
+        row_color, col_color = _refine(cells, size, height, width)
+        for rows in _orders(row_color, height, limit):
+            for cols in _orders(col_color, width, limit):
+                key, labels = _relabel(cells, size, rows, cols)
+                if (best is None or key < best.key):
+                    best = CanonicalForm(key, size, transposed, rows, cols, labels)
+    return best
+
+def canonical_key(puzzle):
+    return canonical_form(puzzle).key
+
+class CanonicalCache:
+    # Set of canonical keys kept in memory for O(1) lookups, with the solution and grade of each once known.
+    # Stored as "key solution difficulty" lines ("-" = unknown), a later line for a key replaces earlier ones
+    # (path None keeps it in memory only)
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.entries = {}  # Key -> [canonical solution or None, difficulty or None]
+        self.file = None
+        if (path is not None and os.path.exists(path)):
+            with open(path) as f:
+                for line in f:
+                    fields = line.split()
+                    key = parse_line(fields[0]) if fields else None
+                    if (key is None or len(fields) < 3):
+                        continue
+                    solution = parse_line(fields[1]) if fields[1] != "-" else None
+                    self.entries[bytes(key)] = [bytes(solution) if solution is not None else None,
+                                                fields[2] if fields[2] != "-" else None]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, puzzle):
+        return canonical_key(puzzle) in self.entries
+
+    def _store(self, key, entry):
+        self.entries[key] = entry
+        if (self.path is None):
+            return
+        if (self.file is None):
+            directory = os.path.dirname(self.path)
+            if (directory):
+                os.makedirs(directory, exist_ok=True)
+            self.file = open(self.path, "a")
+        solution, difficulty = entry
+        self.file.write(f"{format_line(key)} {format_line(solution) if solution else '-'} {difficulty or '-'}\n")
+
+    def add(self, puzzle, solution=None):
+        # Remember a puzzle, False when an equivalent one is already known
+        form = canonical_form(puzzle)
+        if (form.key in self.entries):
+            return False
+        self._store(form.key, [form.apply(solution) if solution is not None else None, None])
+        return True
+
+    def solve(self, puzzle):
+        # Solution of a unique puzzle, from the cache when an equivalent puzzle was solved before
+        form = canonical_form(puzzle)
+        entry = self.entries.get(form.key, [None, None])
+        if (entry[0] is None):
+            size = form.size
+            result = SudokuSolver(size, box_height(size)).solve(puzzle)
+            if (not result.is_unique):
+                return None
+            entry = [form.apply(result.solution), entry[1]]
+            self._store(form.key, entry)
+        return form.invert(entry[0])
+
+    def grade(self, puzzle):
+        # Difficulty from the technique grader, graded once per equivalence class
+        form = canonical_form(puzzle)
+        entry = self.entries.get(form.key, [None, None])
+        if (entry[1] is None):
+            size = form.size
+            result = SudokuGrader(size, box_height(size)).grade(puzzle)
+            if (not result.solved):
+                return None
+            entry = [entry[0] or form.apply(result.solution), result.difficulty]
+            self._store(form.key, entry)
+        return entry[1]
+
+    def close(self):
+        if (self.file is not None):
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,112 @@
+from array import array
+import gzip
+import io
+import math
+from sudoku_geometry import box_height
+
+# Puzzle-per-line text formats used by public collections:
+#   .txt / .sdm : one puzzle per line, e.g. "4.....8.5.3..........7......2.....6....." (81 characters for 9x9),
+#                 optionally followed by ",solution" or by other fields after a space/tab
+#   .sdk        : one grid per block, a row per line, "#" comment lines and separator lines allowed
+# 1-9 are numbers, larger grids continue with letters (A = 10, B = 11 ... Z = 35, then @ = 36), ".", "0", "-", "*" and "_" are empty.
+SYMBOLS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ@"
+EMPTY = ".0-*_"
+GRID_EXTENSIONS = (".sdk",)
+_VALUES = {symbol: value for value, symbol in enumerate(SYMBOLS, 1)}
+_VALUES.update({symbol.lower(): value for value, symbol in enumerate(SYMBOLS, 1) if symbol.isalpha()})
+_VALUES.update({symbol: 0 for symbol in EMPTY})
+
+def parse_line(text):
+    # "..3.2.6.." -> array of numbers (0 = empty), None if text is not a grid that splits into boxes
+    grid_size = math.isqrt(len(text))
+    if (grid_size * grid_size != len(text) or box_height(grid_size) == 1):
+        return None
+    try:
+        cells = array("B", (_VALUES[symbol] for symbol in text))
+    except KeyError:
+        return None
+    if (max(cells) > grid_size):
+        return None
+    return cells
+
+def format_line(cells, empty="."):
+    return "".join(SYMBOLS[num - 1] if num else empty for num in cells)
+
+def _open_text(source):
+    # Text stream for a path (gzip recognised by its magic bytes) or an already open file
+    if (not isinstance(source, (str, bytes)) and not hasattr(source, "__fspath__")):
+        return source, False
+    raw = open(source, "rb")
+    if (raw.peek(2)[:2] == b"\x1f\x8b"):
+        raw = gzip.GzipFile(fileobj=raw)
+    return io.TextIOWrapper(raw, encoding="ascii", errors="replace"), True
+
+def _source_name(source):
+    name = str(getattr(source, "name", source)).lower()
+    return name[:-3] if name.endswith(".gz") else name
+
+def read_puzzle_lines(source):
+    # Yield (puzzle, solution or None) from a puzzle-per-line file, one line at a time
+    file, is_owned = _open_text(source)
+    try:
+        for line in file:
+            line = line.strip()
+            if (not line or line[0] == "#"):
+                continue
+            fields = line.replace(",", " ").replace(";", " ").split()
+            puzzle = parse_line(fields[0])
+            if (puzzle is None):
+                continue  # Header or malformed line
+            solution = parse_line(fields[1]) if (len(fields) > 1) else None
+            if (solution is not None and len(solution) != len(puzzle)):
+                solution = None
+            yield puzzle, solution
+    finally:
+        if (is_owned):
+            file.close()
+
+def read_puzzle_grids(source):
+    # Yield (puzzle, None) from .sdk style files where each row of the grid is on its own line
+    file, is_owned = _open_text(source)
+    try:
+        symbols, grid_size = [], 0
+        for line in file:
+            line = line.strip()
+            if (not line or line[0] in "#[" or set(line) <= set("-+=| ")):
+                continue  # Comments, section titles and separator lines
+            row = [symbol for symbol in line if symbol in _VALUES]
+            if (not symbols):
+                grid_size = len(row)
+            symbols.extend(row)
+            if (grid_size and len(symbols) >= grid_size * grid_size):
+                puzzle = parse_line("".join(symbols[:grid_size * grid_size]))
+                symbols = []
+                if (puzzle is not None):
+                    yield puzzle, None
+    finally:
+        if (is_owned):
+            file.close()
+
+def read_puzzles(source):
+    # Pick the reader from the file extension
+    if (_source_name(source).endswith(GRID_EXTENSIONS)):
+        return read_puzzle_grids(source)
+    return read_puzzle_lines(source)
+
+def write_puzzles(path, puzzles, with_solution=True):
+    # Write (puzzle, solution) pairs as they arrive, gzip when path ends with .gz
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    is_grid = _source_name(path).endswith(GRID_EXTENSIONS)
+    count = 0
+    with opener(path, "wt") as f:
+        for puzzle, solution in puzzles:
+            if (is_grid):
+                grid_size = math.isqrt(len(puzzle))
+                line = format_line(puzzle)
+                f.write("".join(line[row:row + grid_size] + "\n" for row in range(0, len(line), grid_size)) + "\n")
+            elif (with_solution and solution is not None):
+                f.write(f"{format_line(puzzle)},{format_line(solution)}\n")
+            else:
+                f.write(format_line(puzzle) + "\n")
+            count += 1
+    return count
@@ -0,0 +1,213 @@
+from array import array
+import mmap
+import struct
+from sudoku_model import SudokuBoard
+
+# Binary library layout (little endian):
+#   header  : magic, version, grid size, mini grid size, bytes per cell (0 = two cells per byte),
+#             puzzle count, record size, offset of the first record
+#   records : fixed size, so record i starts at first_record + i * record_size (the index is arithmetic)
+#             cells, answers, givens bitset, read-only bitset, hint count, max hints, removed count
+MAGIC = b"SDKL"
+VERSION = 2
+HEADER = struct.Struct("<4sBBBBIII")
+FOOTERS = {1: struct.Struct("<BBH"), 2: struct.Struct("<HHH")}  # Version -> hint count, max hints, removed count
+FOOTER = FOOTERS[VERSION]  # Custom games can allow more than 255 hints on big grids
+BINARY_EXTENSION = ".sdb"
+
+class SavedGame:
+    # A board plus the game state stored next to it
+    __slots__ = ("board", "hint_count", "max_hint", "num_to_remove")
+
+    def __init__(self, board, hint_count=0, max_hint=0, num_to_remove=0):
+        self.board = board
+        self.hint_count = hint_count
+        self.max_hint = max_hint
+        self.num_to_remove = num_to_remove
+
+def write_text_game(file, game):
+    # Original .dat layout: three matrices, hints and difficulty
+    board = game.board
+    file.write(f"Grid Size : {board.grid_size}\n")
+    file.write(f"Mini Grid Size : {board.mini_grid_size}\n")
+    file.write("Saved grid\n")
+    for row in board.rows():
+        file.write("".join(f"{value} " for value in row) + "\n")
+    file.write("Editable\n")  # 1 = read-only, 0 = editable
+    for row in board.rows(board.editable):
+        file.write("".join(f"{1 - value} " for value in row) + "\n")
+    file.write("Answer\n")
+    for row in board.rows(board.answers):
+        file.write("".join(f"{value} " for value in row) + "\n")
+    file.write(f"Hints {game.hint_count}/{game.max_hint}\n")
+    file.write(f"Difficulty : {game.num_to_remove - game.hint_count}")
+
+def read_text_game(file):
+    # Parse the .dat layout written by write_text_game
+    grid_size = int(file.readline().split(" : ")[1])
+    mini_grid_size = int(file.readline().split(" : ")[1])
+    board = SudokuBoard(grid_size, mini_grid_size)
+    def read_matrix():
+        file.readline()  # Section title
+        values = []
+        for _ in range(grid_size):
+            values.extend(int(value) for value in file.readline().split()[:grid_size])
+        return values
+    board.load_cells(read_matrix())
+    for i, read_only in enumerate(read_matrix()):
+        if (read_only == 1):
+            board.editable[i] = 0
+            board.givens[i] = 1
+    # The Answer section may be missing or damaged, the board then keeps empty answers to be solved later
+    hint_count, max_hint, difficulty = 0, 0, None
+    lines = iter(file.readline, "")
+    for line in lines:
+        if (line.startswith("Answer")):
+            try:
+                answers = [int(value) for _ in range(grid_size) for value in next(lines).split()[:grid_size]]
+            except (ValueError, StopIteration):
+                continue
+            if (len(answers) == board.cell_count and max(answers) <= grid_size):
+                board.load_answers(answers)
+        elif (line.startswith("Hints")):
+            hint_count, max_hint = map(int, line.split()[1].split("/"))
+        elif (line.startswith("Difficulty")):
+            difficulty = int(line.split(" : ")[1])  # Saved without the hints already used
+    if (difficulty is None):
+        difficulty = board.cell_count - board.filled_count - hint_count
+    return SavedGame(board, hint_count, max_hint, difficulty + hint_count)
+
+def _cell_bytes(grid_size):
+    # Numbers up to 15 fit in a nibble
+    return 0 if grid_size < 16 else 1
+
+def _cells_size(grid_size):
+    cell_count = grid_size * grid_size
+    return (cell_count + 1) // 2 if _cell_bytes(grid_size) == 0 else cell_count
+
+def _record_size(grid_size):
+    return 2 * _cells_size(grid_size) + 2 * ((grid_size * grid_size + 7) // 8) + FOOTER.size
+
+def _pack_cells(values, grid_size):
+    if (_cell_bytes(grid_size)):
+        return bytes(values)
+    values = list(values) + [0] * (len(values) % 2)
+    return bytes((high << 4) | low for high, low in zip(values[0::2], values[1::2]))
+
+def _unpack_cells(data, cell_count, grid_size):
+    if (_cell_bytes(grid_size)):
+        return array("B", data)
+    values = array("B", bytes(2 * len(data)))
+    values[0::2] = array("B", (b >> 4 for b in data))
+    values[1::2] = array("B", (b & 15 for b in data))
+    return values[:cell_count]
+
+def _pack_bits(flags):
+    return sum(1 << i for i, flag in enumerate(flags) if flag).to_bytes((len(flags) + 7) // 8, "little")
+
+def _unpack_bits(data, cell_count):
+    bits = int.from_bytes(data, "little")
+    return bytearray((bits >> i) & 1 for i in range(cell_count))
+
+def pack_game(game):
+    # One fixed-size binary record
+    board = game.board
+    size = board.grid_size
+    return (_pack_cells(board.cells, size) + _pack_cells(board.answers, size) + _pack_bits(board.givens)
+            + _pack_bits([1 - flag for flag in board.editable])
+            + FOOTER.pack(game.hint_count, game.max_hint, game.num_to_remove))
+
+def unpack_game(data, grid_size, mini_grid_size, version=VERSION):
+    cell_count = grid_size * grid_size
+    cells_size, bits_size = _cells_size(grid_size), (cell_count + 7) // 8
+    board = SudokuBoard(grid_size, mini_grid_size)
+    offset = 0
+    board.load_cells(_unpack_cells(data[offset:offset + cells_size], cell_count, grid_size))
+    offset += cells_size
+    answers = _unpack_cells(data[offset:offset + cells_size], cell_count, grid_size)
+    offset += cells_size
+    board.givens = _unpack_bits(data[offset:offset + bits_size], cell_count)
+    offset += bits_size
+    board.editable = bytearray(1 - flag for flag in _unpack_bits(data[offset:offset + bits_size], cell_count))
+    offset += bits_size
+    board.load_answers(answers)
+    footer = FOOTERS[version]
+    return SavedGame(board, *footer.unpack(data[offset:offset + footer.size]))
+
+class PuzzleLibraryWriter:
+    # Stream records into a binary library, the count in the header is filled in on close
+    def __init__(self, path, grid_size, mini_grid_size):
+        self.grid_size, self.mini_grid_size = grid_size, mini_grid_size
+        self.count = 0
+        self.file = open(path, "wb")
+        self.file.write(self._header())
+
+    def _header(self):
+        return HEADER.pack(MAGIC, VERSION, self.grid_size, self.mini_grid_size, _cell_bytes(self.grid_size),
+                           self.count, _record_size(self.grid_size), HEADER.size)
+
+    def write(self, game):
+        if (game.board.grid_size != self.grid_size):
+            raise ValueError(f"Library holds {self.grid_size}x{self.grid_size} grids")
+        self.file.write(pack_game(game))
+        self.count += 1
+
+    def close(self):
+        self.file.seek(0)
+        self.file.write(self._header())
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class PuzzleLibrary:
+    # Read-only memory-mapped library, library[i] only touches record i
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.grid_size, self.mini_grid_size, _, self.count, self.record_size, self.first_record = HEADER.unpack_from(self.map, 0)
+        if (magic != MAGIC or self.version not in FOOTERS):
+            self.map.close()
+            raise ValueError("Not a Sudoku library file")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if (index < 0):
+            index += self.count
+        if (not 0 <= index < self.count):
+            raise IndexError("puzzle index out of range")
+        start = self.first_record + index * self.record_size
+        return unpack_game(self.map[start:start + self.record_size], self.grid_size, self.mini_grid_size, self.version)
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def save_game_file(path, game):
+    # .sdb saves use the binary record, anything else the text layout
+    if (path.lower().endswith(BINARY_EXTENSION)):
+        with PuzzleLibraryWriter(path, game.board.grid_size, game.board.mini_grid_size) as writer:
+            writer.write(game)
+    else:
+        with open(path, "w") as f:
+            write_text_game(f, game)
+
+def load_game_file(path, index=0):
+    # Load a saved game from either format (binary files are recognised by their magic)
+    with open(path, "rb") as f:
+        is_binary = f.read(len(MAGIC)) == MAGIC
+    if (is_binary):
+        with PuzzleLibrary(path) as library:
+            return library[index]
+    with open(path, "r") as f:
+        return read_text_game(f)
@@ -0,0 +1,167 @@
+from collections import deque
+import itertools
+import os
+import random
+import threading
+from puzzle_formats import read_puzzle_lines, write_puzzles
+from sudoku_generator import SudokuGenerator
+from sudoku_model import GRID_SIZES, difficulty_ranges
+
+DEFAULT_POOL_DIR = os.path.join(os.path.expanduser("~"), ".sudoku_tkinter", "pool")
+
+class PuzzlePool:
+    # Ready-made puzzles per (grid size, difficulty), saved as one line file per key.
+    # A background thread tops every wanted key up to high_water and writes changes to disk,
+    # the oldest puzzles are dropped when the pool holds more than max_total.
+    # While the game generates a puzzle itself (pause/resume) the thread stands aside, so the two never share the CPU
+    def __init__(self, directory=DEFAULT_POOL_DIR, high_water=5, max_total=200, rng=None, max_grid_size=25):
+        self.directory = directory
+        self.max_grid_size = max_grid_size  # Bigger grids are left out, a 36x36 Hard puzzle takes about 30 s
+        self.high_water = high_water
+        self.max_total = max_total
+        self.rng = rng or random.Random()
+        self.pools = {}  # (grid size, difficulty) -> deque of (age, puzzle, solution), oldest on the left
+        self.wanted = []  # Keys the refill thread keeps full
+        self.age = itertools.count()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.paused = 0  # Generations the game is running itself
+        self.interrupt = threading.Event()  # Set while stopped or paused, cancels the puzzle being generated
+        self.changed = set()  # Keys whose file is out of date
+        self.thread = None
+        self.load()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"pool_{key[0]}_{key[1].lower()}.txt")
+
+    def load(self):
+        # Read every pool file that exists
+        for grid_size in GRID_SIZES:
+            if (grid_size > self.max_grid_size):
+                continue
+            for difficulty, _ in difficulty_ranges(grid_size):
+                key = (grid_size, difficulty)
+                path = self._path(key)
+                if (os.path.exists(path)):
+                    self.pools[key] = deque((next(self.age), puzzle, solution)
+                                            for puzzle, solution in read_puzzle_lines(path) if solution is not None)
+                    self.wanted.append(key)  # Used before, keep it ready
+        self._evict(self.max_total)  # The budget may have been lowered since the files were written
+
+    def save(self):
+        # Rewrite the files of changed keys (write then rename so a crash never leaves half a file)
+        with self.lock:
+            changed, self.changed = self.changed, set()
+            snapshot = {key: [(puzzle, solution) for _, puzzle, solution in self.pools.get(key, ())] for key in changed}
+        if (snapshot):
+            os.makedirs(self.directory, exist_ok=True)
+        for key, puzzles in snapshot.items():
+            path = self._path(key)
+            write_puzzles(path + ".tmp", puzzles)
+            os.replace(path + ".tmp", path)
+
+    def size(self, grid_size, difficulty):
+        return len(self.pools.get((grid_size, difficulty), ()))
+
+    def take(self, grid_size, difficulty):
+        # Pop the oldest ready puzzle in O(1), None when this key is empty (or its grid is too big to pool)
+        if (grid_size > self.max_grid_size):
+            return None
+        key = (grid_size, difficulty)
+        with self.lock:
+            pool = self.pools.get(key)
+            entry = pool.popleft() if pool else None
+            if (entry is not None):
+                self.changed.add(key)
+            else:
+                self._evict(self.max_total - 1)  # Make room so this key can refill
+        self.want(grid_size, difficulty)
+        return None if entry is None else entry[1:]
+
+    def put(self, grid_size, difficulty, puzzle, solution):
+        key = (grid_size, difficulty)
+        with self.lock:
+            self.pools.setdefault(key, deque()).append((next(self.age), puzzle, solution))
+            self.changed.add(key)
+            self._evict(self.max_total)
+
+    def _total(self):
+        return sum(len(pool) for pool in self.pools.values())
+
+    def _evict(self, limit):
+        # Drop the oldest puzzles until at most limit are left (called with the lock held)
+        total = self._total()
+        while total > limit:
+            key = min((key for key, pool in self.pools.items() if pool), key=lambda key: self.pools[key][0][0])
+            self.pools[key].popleft()
+            self.changed.add(key)
+            total -= 1
+
+    def want(self, grid_size, difficulty):
+        # Keep this key topped up from now on
+        if (grid_size > self.max_grid_size):
+            return
+        with self.lock:
+            if ((grid_size, difficulty) not in self.wanted):
+                self.wanted.append((grid_size, difficulty))
+        self.wake.set()
+
+    def pause(self):
+        # The game is generating a puzzle: drop the one being made here and wait for resume()
+        with self.lock:
+            self.paused += 1
+            self.interrupt.set()
+
+    def resume(self):
+        with self.lock:
+            self.paused -= 1
+            if (self.paused == 0 and not self.stopped.is_set()):
+                self.interrupt.clear()
+        self.wake.set()
+
+    def _missing(self):
+        # First wanted key below the high-water mark, None while the pool is full or paused
+        with self.lock:
+            if (self.paused or self._total() >= self.max_total):
+                return None
+            for key in self.wanted:
+                if (len(self.pools.get(key, ())) < self.high_water):
+                    return key
+        return None
+
+    def generate(self, grid_size, difficulty):
+        # One puzzle for a key, the removal count is picked from the difficulty range
+        remove_range = dict(difficulty_ranges(grid_size))[difficulty]
+        generator = SudokuGenerator(grid_size, GRID_SIZES[grid_size], self.rng)
+        return generator.generate(self.rng.randint(*remove_range), cancel=self.interrupt)
+
+    def _refill(self):
+        while not self.stopped.is_set():
+            key = self._missing()
+            self.save() # Before generating, so a taken puzzle is off disk before a crash could serve it again
+            if (key is None):
+                self.wake.wait()
+                self.wake.clear()
+                continue
+            puzzle, solution = self.generate(*key)
+            if (puzzle is not None):
+                self.put(key[0], key[1], puzzle, solution)
+        self.save()
+
+    def start(self):
+        # Start the background refill thread
+        if (self.thread is None):
+            self.thread = threading.Thread(target=self._refill, daemon=True)
+            self.thread.start()
+
+    def close(self):
+        # Stop refilling (a puzzle being generated is dropped, so this returns quickly) and write what is left
+        self.stopped.set()
+        self.interrupt.set()
+        self.wake.set()
+        if (self.thread is not None):
+            self.thread.join()
+            self.thread = None
+        else:
+            self.save()
@@ -0,0 +1,314 @@
+from array import array
+import argparse
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import json
+import math
+import os
+import random
+import signal
+import sys
+import time
+from urllib.parse import parse_qsl
+from hint_engine import HintEngine
+from puzzle_formats import parse_line, format_line
+from sudoku_generator import SudokuGenerator
+from sudoku_geometry import box_height
+from sudoku_grader import SudokuGrader
+from sudoku_model import GRID_SIZES, difficulty_ranges, puzzle_board
+from sudoku_solver import SudokuSolver
+
+# Local HTTP/JSON puzzle backend (stdlib only):
+#   POST /generate {"size": 9, "difficulty": "Hard", "seed": 1, "unique": true} -> puzzle, solution, seed
+#   POST /solve    {"puzzle": "..3.2.6.."}                 -> solution (null without one), unique
+#   POST /grade    {"puzzle": "..."}                       -> difficulty, score, techniques
+#   POST /validate {"board": "...", "puzzle": "..."}       -> complete, valid, conflicts, givens_kept
+#   POST /hint     {"board": "...", "puzzle": "..."}       -> next deduction, or the wrong cells
+#   GET  /health                                           -> counters
+# Grids are puzzle lines (puzzle_formats, "." = empty) or flat number lists (0 = empty). GET also takes
+# the fields as query parameters. Answers carry grids as puzzle lines.
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+MAX_BODY = 1 << 20
+DIFFICULTIES = ["Easy", "Medium", "Hard", "Extreme", "Random"]
+
+def parse_cells(value, name):
+    # Puzzle line or number list -> array of numbers, ValueError when it is not a grid
+    cells = None
+    if (isinstance(value, str)):
+        cells = parse_line(value.strip())
+    elif (isinstance(value, list) and all(isinstance(num, int) for num in value)):
+        grid_size = math.isqrt(len(value))
+        if (grid_size * grid_size == len(value) and box_height(grid_size) > 1 and all(0 <= num <= grid_size for num in value)):
+            cells = array("B", value)
+    if (cells is None):
+        raise ValueError(f"{name} must be a puzzle line or a list of numbers of a square grid")
+    return cells
+
+# Jobs: plain functions of plain data, run in the worker processes
+
+def generate_job(grid_size, difficulty, seed, unique):
+    rng = random.Random(seed)
+    generator = SudokuGenerator(grid_size, GRID_SIZES[grid_size], rng)
+    puzzle, solution = generator.generate(rng.randint(*dict(difficulty_ranges(grid_size))[difficulty]), unique=unique)
+    return {"size": grid_size, "difficulty": difficulty, "seed": seed, "puzzle": format_line(puzzle),
+            "solution": format_line(solution), "givens": grid_size * grid_size - puzzle.count(0)}
+
+def solve_job(puzzle):
+    grid_size = math.isqrt(len(puzzle))
+    result = SudokuSolver(grid_size, box_height(grid_size)).solve(puzzle)
+    return {"solution": format_line(result.solution) if result.count else None, "unique": result.is_unique,
+            "elapsed_ms": result.elapsed * 1000}
+
+def grade_job(puzzle):
+    grid_size = math.isqrt(len(puzzle))
+    result = SudokuGrader(grid_size, box_height(grid_size)).grade(puzzle)
+    if (not result.solved):
+        return {"solved": False}
+    return {"solved": True, "difficulty": result.difficulty, "score": result.score, "hardest": result.hardest,
+            "techniques": result.techniques, "solution": format_line(result.solution)}
+
+def hint_job(board_cells, puzzle):
+    # Next step on a board the player is filling, puzzle = its givens (the board's numbers when missing)
+    grid_size = math.isqrt(len(board_cells))
+    givens = board_cells if puzzle is None else puzzle
+    solution = SudokuSolver(grid_size, box_height(grid_size)).solve(givens, limit=1).solution
+    if (solution is None):
+        return {"solvable": False}
+    board = puzzle_board(givens, solution)
+    for i, num in enumerate(board_cells):
+        if (num and not givens[i]):
+            board.set(i // grid_size, i % grid_size, num)
+    engine = HintEngine(board)
+    wrong = engine.wrong_cells()
+    if (wrong):
+        return {"solvable": True, "wrong": wrong}
+    empty = [i for i in range(board.cell_count) if not board.cells[i]]
+    if (not empty):
+        return {"solvable": True, "solved": True}
+    deduction, steps = engine.next_placement()
+    if (deduction is None):
+        # Only guessing is left, give the first empty cell from the solution
+        cell = empty[0]
+        return {"solvable": True, "technique": "Guess", "cell": cell, "row": cell // grid_size, "col": cell % grid_size,
+                "number": solution[cell], "explanation": [f"No logical step left, {engine.cell_name(cell)} is {solution[cell]}."]}
+    return {"solvable": True, "technique": deduction.technique, "cell": deduction.cell, "row": deduction.cell // grid_size,
+            "col": deduction.cell % grid_size, "number": deduction.number,
+            "explanation": [engine.explain(step) for step in steps + [deduction]]}
+
+def validate_cells(board_cells, puzzle):
+    # Cheap (one pass over the unit counters), answered on the event loop
+    board = puzzle_board(board_cells)
+    conflicts = [i for i in range(board.cell_count) if board.is_conflict(i)]
+    complete = board.filled_count == board.cell_count
+    result = {"complete": complete, "valid": complete and not conflicts, "conflicts": conflicts}
+    if (puzzle is not None):
+        if (len(puzzle) != len(board_cells)):
+            raise ValueError("board and puzzle have different sizes")
+        result["givens_kept"] = all(not given or given == num for given, num in zip(puzzle, board_cells))
+        result["valid"] = result["valid"] and result["givens_kept"]
+    return result
+
+def _ready():
+    return os.getpid()
+
+class PuzzleService:
+    # Routes requests to the jobs above. Identical requests that arrive while one is running share its
+    # result, and the last cache_size results are kept (least recently used dropped first)
+    def __init__(self, workers=None, cache_size=4096, max_pending=1024):
+        self.workers = workers or os.cpu_count()
+        self.executor = None
+        self.cache = OrderedDict()  # Request key -> response
+        self.cache_size = cache_size
+        self.inflight = {}  # Request key -> future of the running job
+        self.pending = asyncio.Semaphore(max_pending)  # Jobs queued for the pool at once
+        self.counters = {"requests": 0, "errors": 0, "cache_hits": 0, "coalesced": 0, "jobs": 0}
+        self.started = time.time()
+        self.routes = {"/generate": self.generate, "/solve": self.solve, "/grade": self.grade,
+                       "/validate": self.validate, "/hint": self.hint}
+
+    async def start(self):
+        # Fork the workers up front so the first requests do not pay for it
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _ready) for _ in range(self.workers)))
+
+    def close(self):
+        if (self.executor is not None):
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def _cached(self, key):
+        response = self.cache.get(key)
+        if (response is not None):
+            self.cache.move_to_end(key)
+            self.counters["cache_hits"] += 1
+        return response
+
+    def _store(self, key, response):
+        self.cache[key] = response
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def run(self, key, job, *args):
+        # Result of job(*args) in the pool, from the cache or a running identical job when possible (key None = always run)
+        if (key is not None):
+            response = self._cached(key)
+            if (response is not None):
+                return response
+            future = self.inflight.get(key)
+            if (future is not None):
+                self.counters["coalesced"] += 1
+                return await asyncio.shield(future)
+        future = asyncio.ensure_future(self._submit(job, *args))
+        if (key is not None):
+            self.inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(future)
+
+    async def _submit(self, job, *args):
+        async with self.pending:
+            self.counters["jobs"] += 1
+            return await asyncio.get_running_loop().run_in_executor(self.executor, job, *args)
+
+    def _finish(self, key, future):
+        del self.inflight[key]
+        if (not future.cancelled() and future.exception() is None):
+            self._store(key, future.result())
+
+    async def generate(self, params):
+        grid_size = int(params.get("size", 9))
+        if (grid_size not in GRID_SIZES):
+            raise ValueError(f"size must be one of {sorted(GRID_SIZES)}")
+        difficulty = params.get("difficulty", "Random")
+        if (difficulty not in DIFFICULTIES):
+            raise ValueError(f"difficulty must be one of {DIFFICULTIES}")
+        unique = params.get("unique", True) not in (False, "false", "0", 0)
+        seed = params.get("seed")
+        # Only seeded requests are repeatable, so only those are shared or cached
+        key = None if seed is None else ("generate", grid_size, difficulty, int(seed), unique)
+        seed = random.randrange(1 << 32) if seed is None else int(seed)
+        return await self.run(key, generate_job, grid_size, difficulty, seed, unique)
+
+    async def solve(self, params):
+        puzzle = parse_cells(params.get("puzzle"), "puzzle")
+        return await self.run(("solve", bytes(puzzle)), solve_job, puzzle)
+
+    async def grade(self, params):
+        puzzle = parse_cells(params.get("puzzle"), "puzzle")
+        return await self.run(("grade", bytes(puzzle)), grade_job, puzzle)
+
+    async def validate(self, params):
+        board = parse_cells(params.get("board"), "board")
+        puzzle = parse_cells(params["puzzle"], "puzzle") if params.get("puzzle") is not None else None
+        return validate_cells(board, puzzle)
+
+    async def hint(self, params):
+        board = parse_cells(params.get("board"), "board")
+        puzzle = parse_cells(params["puzzle"], "puzzle") if params.get("puzzle") is not None else None
+        if (puzzle is not None and len(puzzle) != len(board)):
+            raise ValueError("board and puzzle have different sizes")
+        key = ("hint", bytes(board), bytes(puzzle) if puzzle is not None else None)
+        return await self.run(key, hint_job, board, puzzle)
+
+    def health(self):
+        return dict(self.counters, ok=True, workers=self.workers, cached=len(self.cache), inflight=len(self.inflight),
+                    uptime_s=round(time.time() - self.started, 1))
+
+    async def dispatch(self, method, target, body):
+        # (status, response) of one request
+        path, _, query = target.partition("?")
+        if (path == "/health"):
+            return 200, self.health()
+        handler = self.routes.get(path)
+        if (handler is None):
+            return 404, {"error": f"unknown path {path}"}
+        if (method not in ("GET", "POST")):
+            return 405, {"error": "use GET or POST"}
+        try:
+            params = dict(parse_qsl(query))
+            if (body):
+                data = json.loads(body)
+                if (not isinstance(data, dict)):
+                    raise ValueError("body must be a JSON object")
+                params.update(data)
+            return 200, await handler(params)
+        except (ValueError, KeyError, TypeError) as e:  # Also raised by bad input inside the jobs
+            return 400, {"error": str(e)}
+
+    async def handle(self, reader, writer):
+        # One connection, kept open between requests (HTTP/1.1 keep-alive)
+        try:
+            while True:
+                line = await reader.readline()
+                if (not line):
+                    break
+                parts = line.decode("latin-1").split()
+                if (len(parts) != 3):
+                    break
+                method, target, version = parts
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if (line in (b"\r\n", b"\n", b"")):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                keep_alive = (headers.get("connection", "").lower() != "close" and version == "HTTP/1.1")
+                if (length > MAX_BODY):
+                    status, response, keep_alive = 413, {"error": "body too large"}, False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    self.counters["requests"] += 1
+                    try:
+                        status, response = await self.dispatch(method, target, body)
+                    except Exception as e:
+                        status, response = 500, {"error": f"{type(e).__name__}: {e}"}
+                if (status != 200):
+                    self.counters["errors"] += 1
+                data = json.dumps(response).encode()
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if (not keep_alive):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # Client went away or sent something that is not HTTP
+        finally:
+            writer.close()
+
+async def serve(host, port, workers=None, cache_size=4096):
+    service = PuzzleService(workers, cache_size)
+    try:
+        # Stop like Ctrl+C on terminate, so the worker processes are shut down with the service
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:  # Windows
+        pass
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port, backlog=1024)
+    print(f"puzzle service on http://{host}:{port} with {service.workers} workers", file=sys.stderr, flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None):
+    # Run the service until interrupted
+    parser = argparse.ArgumentParser(description="Serve puzzle generation, solving, grading, validation and hints over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (local only by default)")
+    parser.add_argument("-p", "--port", type=int, default=8765)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="worker processes for the CPU-bound jobs")
+    parser.add_argument("--cache-size", type=int, default=4096, help="recent results kept")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.cache_size))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
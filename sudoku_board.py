@@ -1,173 +1,256 @@
 import tkinter as tk
-from tkinter import messagebox, filedialog, ttk
+from tkinter import messagebox, ttk
+import queue
 import random
+import threading
+from sudoku_generator import SudokuGenerator
+from sudoku_model import SudokuBoard, GRID_SIZES, difficulty_ranges
+from puzzle_library import SavedGame, save_game_file, load_game_file
+from puzzle_pool import PuzzlePool
+from canvas_board import CanvasGrid, NAVIGATION_KEYS
+from perf_monitor import monitor
+from edit_history import EditHistory
+from autosave import AutosaveJournal
 
 class SudokuGame:
     # Encapsule all function
     def __init__(self, root):
         self.root = root
         self.GRID_SIZE, self.MINI_GRID_SIZE = 9, 3
-        self.ANSWERS_GRID = [[0] * self.GRID_SIZE for _ in range(self.GRID_SIZE)]  # Store original grid
-        self.EDITABLE_GRID = [[0] * self.GRID_SIZE for _ in range(self.GRID_SIZE)]  # Track editable states (0 = editable, 1 = read-only)
+        self.board = SudokuBoard(self.GRID_SIZE, self.MINI_GRID_SIZE)  # Numbers, answers and locked cells
         self.is_revealed = False
         self.entries = [[0 for _ in range(self.GRID_SIZE)] for _ in range(self.GRID_SIZE)]  # Store Entry widgets
+        self.entry_cells = {}  # Entry widget -> (row, col)
+        self.grid_widgets = {}  # (grid size, mini grid size, renderer) -> widgets built for it, kept for reuse
+        self.grid_renderer = "auto" # "entries", "canvas" or "auto" (canvas from canvas_grid_size up)
+        self.canvas_grid_size = 25
+        self.is_entry_events_bound = False
+        self.vcmd = (self.root.register(self.validate_input), "%P")  # Register validation function once
+        for key in NAVIGATION_KEYS:
+            # Change grid by using keyboard, handled once for every cell through the "SudokuCell" bind tag
+            self.root.bind_class("SudokuCell", f"<{key}>", self.on_navigate_key)
+        self.root.bind_class("SudokuCell", "<KeyRelease>", self.on_entry_change)
         self.hint_count , self.max_hint = 0, 0 
+        self.hint_engine = None # Candidates and eliminations of the current board, built on the first hint
+        self.history = None # Undo/redo log of the current board, started on the first edit
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+        self.root.bind("<Control-Z>", lambda event: self.redo()) # Ctrl+Shift+Z
         self.font_size, self.button_size, self.progress_bar_size = 6, 1, 300 # Default
         self.progress_percentage = 0
         self.button_pad_y = 3
         self.num_to_remove = 0
+        self.unique_puzzles = True # Only remove numbers while the puzzle keeps one solution
+        self.puzzle_pool = PuzzlePool() # Ready puzzles for "New game", refilled in the background
+        self.puzzle_pool.start()
+        self.autosave = AutosaveJournal() # Every move is journaled in the background, offered again on the next start
+        self.autosave.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.close) # The window's X saves like Quit does
         self.grid_gap = 4
         self.primary_color = "light blue"
         self.secondary_color = "light yellow"
+        self.conflict_color = "red"
 
     def resize_grid(self):
         # Resize grid based on GRID_SIZE
-        self.ANSWERS_GRID = [[0] * self.GRID_SIZE for _ in range(self.GRID_SIZE)] # Reset answers grid
-        self.EDITABLE_GRID = [[0] * self.GRID_SIZE for _ in range(self.GRID_SIZE)] 
-        self.entries = [[0 for _ in range(self.GRID_SIZE)] for _ in range(self.GRID_SIZE)]  # Reset Entry widgets
+        self.board = SudokuBoard(self.GRID_SIZE, self.MINI_GRID_SIZE) # Reset board
         
     def validate_input(self, char):
-    # Allow only numbers 1-16
-        if (len(char) <= 2):
+    # Allow only numbers 1-GRID_SIZE
+        if (len(char) <= len(str(self.GRID_SIZE))):
             if (char.isdigit() and 1 <= int(char) <= self.GRID_SIZE or char == ""):
                 return True  # Also allow clearing the entry
         return False
 
+    def grid_key(self):
+        # Which widget set shows the current grid (box borders and shading depend on the box height too)
+        if (self.grid_renderer == "auto"):
+            return (self.GRID_SIZE, self.MINI_GRID_SIZE, "canvas" if self.GRID_SIZE >= self.canvas_grid_size else "entries")
+        return (self.GRID_SIZE, self.MINI_GRID_SIZE, self.grid_renderer)
+
     def create_grid(self, parent):
-    # Create a Sudoku grid with border
-        vcmd = (self.root.register(self.validate_input), "%P")  # Register validation function
+    # Show the Sudoku grid, widgets are built the first time a grid size is used and reused afterwards
+        key = self.grid_key()
+        if (key not in self.grid_widgets):
+            self.grid_widgets[key] = self.build_canvas_grid(parent) if key[2] == "canvas" else self.build_grid(parent)
+        for other_key, widgets in self.grid_widgets.items():
+            if (other_key != key):
+                widgets["frame"].pack_forget()
+        widgets = self.grid_widgets[key]
+        widgets["frame"].pack()
+        self.entries, self.entry_cells = widgets["entries"], widgets["cells"]
+        if (widgets["colors"] != (self.primary_color, self.secondary_color)):
+            self.color_grid(widgets)
+        self.refresh_entries()
+
+    def build_canvas_grid(self, parent):
+    # One Canvas for the whole board (much lighter than N x N entries on big grids)
+        canvas_grid = CanvasGrid(parent, self.GRID_SIZE, self.MINI_GRID_SIZE, self.font_size, self.grid_gap, self.on_canvas_input)
+        return {"frame": canvas_grid.canvas, "canvas": canvas_grid, "entries": [], "cells": {}, "colors": None}
+
+    def build_grid(self, parent):
+    # Create the entries for GRID_SIZE, each drawing its own black border (one widget per cell keeps startup quick)
+        frame = tk.Frame(parent)
+        entries = [[0 for _ in range(self.GRID_SIZE)] for _ in range(self.GRID_SIZE)]
+        cells = {}
+        box_width = self.GRID_SIZE // self.MINI_GRID_SIZE # Boxes are MINI_GRID_SIZE rows by box_width columns
         for row in range(self.GRID_SIZE):
             for col in range(self.GRID_SIZE):
-                # Alternate colors based on blocks
-                entry_color = self.primary_color if (row // self.MINI_GRID_SIZE + col // self.MINI_GRID_SIZE) % 2 == 0 else self.secondary_color
                 top_border = self.grid_gap if row % self.MINI_GRID_SIZE == 0 else 1 # Highlight
-                left_border = self.grid_gap if col % self.MINI_GRID_SIZE == 0 else 1
+                left_border = self.grid_gap if col % box_width == 0 else 1
                 bottom_border = self.grid_gap if row == self.GRID_SIZE - 1 else 1
                 right_border = self.grid_gap if col == self.GRID_SIZE - 1 else 1
-                border = tk.Frame(parent, highlightbackground="black", highlightthickness=1)
-                border.grid(row=row, column=col, padx=(left_border, right_border), pady=(top_border, bottom_border))
-                entry = tk.Entry(border, bg=entry_color, width=3, justify="center", font=("Arial", self.font_size + 8), validate="key", validatecommand=vcmd)
-                entry.pack(padx=1, pady=1)
-                self.entries[row][col] = entry  # Store Entry widget
-                for key, direction in [("<Up>", (-1, 0)), ("<Down>", (1, 0)), ("<Left>", (0, -1)), ("<Right>", (0, 1)),
-                                    ("<w>", (-1, 0)), ("<s>", (1, 0)), ("<a>", (0, -1)), ("<d>", (0, 1)),
-                                    ("<W>", (-1, 0)), ("<S>", (1, 0)), ("<A>", (0, -1)), ("<D>", (0, 1))]:
-                                    # Change grid by using keyboard
-                    entry.bind(key, lambda _, row=row, col=col, d=direction: self.move_grid(row + d[0], col + d[1])) 
-
+                entry = tk.Entry(frame, width=3, justify="center", font=("Arial", self.font_size + 8), validate="key", validatecommand=self.vcmd,
+                                 highlightthickness=1, highlightbackground="black", highlightcolor="black")
+                entry.grid(row=row, column=col, padx=(left_border, right_border), pady=(top_border, bottom_border))
+                entry.bindtags((str(entry), "SudokuCell") + entry.bindtags()[1:]) # Shared key handlers
+                entries[row][col] = entry  # Store Entry widget
+                cells[entry] = (row, col)
+        widgets = {"frame": frame, "entries": entries, "cells": cells, "colors": None,
+                   "shown": [0] * (self.GRID_SIZE * self.GRID_SIZE), # Number each entry shows
+                   "locked": [0] * (self.GRID_SIZE * self.GRID_SIZE), # 1 = entry is read-only
+                   "conflict": [False] * (self.GRID_SIZE * self.GRID_SIZE)} # True = shown in the conflict color
+        self.color_grid(widgets)
+        return widgets
+
+    def color_grid(self, widgets):
+    # Alternate colors based on blocks
+        if ("canvas" in widgets):
+            widgets["canvas"].recolor(self.primary_color, self.secondary_color)
+        else:
+            box_width = self.GRID_SIZE // self.MINI_GRID_SIZE
+            for row, entries in enumerate(widgets["entries"]):
+                for col, entry in enumerate(entries):
+                    entry_color = self.primary_color if (row // self.MINI_GRID_SIZE + col // box_width) % 2 == 0 else self.secondary_color
+                    entry.config(bg=entry_color)
+        widgets["colors"] = (self.primary_color, self.secondary_color) # Reused widgets are only recolored after a change
+
+    def update_entry(self, i):
+    # Copy one cell from the board to its Entry widget, skipping it when it already matches
+        widgets = self.grid_widgets[self.grid_key()]
+        num, locked, conflict = self.board.cells[i], 1 - self.board.editable[i], self.board.is_conflict(i)
+        if ("canvas" in widgets):
+            widgets["canvas"].update_cell(i, num, locked, conflict)
+            return
+        row, col = divmod(i, self.GRID_SIZE)
+        entry = self.entries[row][col]
+        if (widgets["conflict"][i] != conflict):
+            entry.config(fg=self.conflict_color if conflict else "black") # Repeated number in a row, column or box
+            widgets["conflict"][i] = conflict
+        if (widgets["shown"][i] == num and widgets["locked"][i] == locked):
+            return
+        entry.config(state="normal")
+        entry.delete(0, tk.END)
+        if (num):
+            entry.insert(0, num)
+        if (locked):
+            entry.config(state="readonly")
+        widgets["shown"][i], widgets["locked"][i] = num, locked
+
+    def sync_entries(self):
+    # Copy changed cells from the board to the Entry widgets
+        for i in self.board.take_dirty():
+            self.update_entry(i)
+
+    def refresh_entries(self):
+    # Bring reused widgets in line with the current board (only differing cells touch Tk)
+        self.board.take_dirty()
+        for i in range(self.board.cell_count):
+            self.update_entry(i)
+
+    @monitor.timed("recreate_grid")
     def recreate_grid(self):
-        if (len(self.entries) != self.GRID_SIZE or len(self.entries[0])):
-            for widget in self.top_frame.winfo_children():
-                widget.destroy() # Clear existing entries
-            self.entries = [[0 for _ in range(self.GRID_SIZE)] for _ in range(self.GRID_SIZE)]  # Reinitialize entries
-            self.create_grid(self.top_frame)
-        else: 
-            for row in range(self.GRID_SIZE):
-                for col in range(self.GRID_SIZE):
-                    self.entries[row][col].config(state="normal", fg="black")
-                    self.entries[row][col].delete(0, tk.END)
+    # Show the widgets for GRID_SIZE (reused when they exist) with the current board
+        self.create_grid(self.top_frame)
     
+    def on_navigate_key(self, event):
+    # Move from the cell that got the key
+        if (event.widget in self.entry_cells):
+            row, col = self.entry_cells[event.widget]
+            direction = NAVIGATION_KEYS[event.keysym]
+            self.move_grid(row + direction[0], col + direction[1])
+
     def move_grid(self, row, col):
     # Move focus to a specific cell, ensuring the row and column stay within bounds
         if (0 <= row < self.GRID_SIZE and 0 <= col < self.GRID_SIZE):
-            self.entries[row][col].focus_set()
-
-    def check_possible_num(self, num, row, col):
-    # Check if the number can be placed in the (row, col) position
-        for j in range(self.GRID_SIZE):
-            if (self.entries[row][j].get() == str(num) or self.entries[j][col].get() == str(num)):
-                return False
-        start_row = (row // self.MINI_GRID_SIZE) * self.MINI_GRID_SIZE
-        start_col = (col // self.MINI_GRID_SIZE) * self.MINI_GRID_SIZE
-        for i in range(self.MINI_GRID_SIZE):
-            for j in range(self.MINI_GRID_SIZE):
-                if (self.entries[start_row + i][start_col + j].get() == str(num)):
-                    return False
-        return True 
-    
+            widgets = self.grid_widgets[self.grid_key()]
+            if ("canvas" in widgets):
+                widgets["canvas"].select(row, col)
+            else:
+                self.entries[row][col].focus_set()
+
     def is_empty(self, row, col):
     # Check if a given cell is empty
-        return self.entries[row][col].get() == ""
-    
-    def find_empty_spot(self):
-    # Find the first empty spot in the grid
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                if self.is_empty(row, col):
-                    return (row, col)
-        return None  # No empty spots
-    
-    def fill_grid(self):
-    # Recursive function to fill the grid using backtracking
-        empty_spot = self.find_empty_spot()
-        if not empty_spot:
-            return True  # Grid is fully filled
-        row, col = empty_spot
-        possible_num = list(range(1, self.GRID_SIZE + 1))  # Possible numbers to fill
-        random.shuffle(possible_num)  # Shuffle to add randomness
-        for num in possible_num:
-            if (self.check_possible_num(num, row, col)):
-                self.entries[row][col].delete(0, tk.END)
-                self.entries[row][col].insert(0, num)
-                self.ANSWERS_GRID[row][col] = num  # Store the number in the answers grid
-                if (self.fill_grid()):  # Recursively fill the next spot
-                    return True
-                # If filling with this number doesn't work, backtrack
-                self.entries[row][col].delete(0, tk.END)
-                self.ANSWERS_GRID[row][col] = 0  # Clear the answer in case of backtrack
-        return False  # Trigger backtracking
-
-    def remove_numbers(self, remove_grid_count, mode): 
-    # Remove numbers from grid
-        print(f"{remove_grid_count} grids has been removed")
-        self.num_to_remove = remove_grid_count # Remove numbers
+        return self.board.is_empty(row, col)
+
+    def remove_numbers(self, puzzle, mode): 
+    # Show the generated puzzle (numbers already removed) and lock its numbers
         if (mode == "randommode"):
             self.max_hint = 3
         if (self.max_hint > 0):    
             self.game_buttons["hint_button"].config(state="normal") 
         self.hint_count = 0
-        all_cells = [(i, j) for i in range(self.GRID_SIZE) for j in range(self.GRID_SIZE)]
-        random.shuffle(all_cells)  # Shuffle to randomly pick cells to clear
-        # Remove numbers from a random set of cells
-        for i in range(self.num_to_remove):
-            row, col = all_cells[i]
-            self.entries[row][col].delete(0, tk.END)
-        self.lock_initial_numbers()
-
-    def lock_initial_numbers(self):
-    # Lock the initially filled numbers and update the editable grid
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                if self.entries[row][col].get() != "":
-                    self.entries[row][col].config(state="readonly")  # Lock the entry
-                    self.EDITABLE_GRID[row][col] = 1  # Mark as read-only
-                else:
-                    self.EDITABLE_GRID[row][col] = 0  # Mark as editable   
+        self.board.load_cells(puzzle)
+        self.board.lock_initial_numbers()
+        self.num_to_remove = self.board.cell_count - self.board.filled_count # Unique carving may remove fewer
+        print(f"{self.num_to_remove} grids has been removed")
+        self.sync_entries() # One batched widget update
+
+    def ensure_answers(self):
+    # Solve the board when no valid answer is stored (e.g. a .dat file without its Answer section)
+        if (self.board.has_answers()):
+            return True
+        if (self.board.solve_answers()):
+            return True
+        messagebox.showerror("Solver", "This board has no solution.")
+        return False
 
+    @monitor.timed("hint")
     def hint(self):
     # Show hint on the random empty grids
+        if (not self.ensure_answers()):
+            return
         if self.max_hint is not None:
             if (self.hint_count < self.max_hint):
-                empty_grids = [(row, col) for row in range(self.GRID_SIZE) for col in range(self.GRID_SIZE) if self.is_empty(row, col)]
+                if (self.hint_engine is None or self.hint_engine.board is not self.board):
+                    from hint_engine import HintEngine  # Loaded on the first hint, not at startup
+                    self.hint_engine = HintEngine(self.board)
+                wrong = self.hint_engine.wrong_cells()
+                if (wrong):
+                    # Deductions need a correct board, point at the mistake first (does not use a hint)
+                    row, col = divmod(wrong[0], self.GRID_SIZE)
+                    self.move_grid(row, col)
+                    messagebox.showinfo("Hint", f"The number at row {row + 1}, column {col + 1} is wrong.")
+                    return
+                empty_grids = self.board.empty_cells()
                 if (empty_grids):
-                    row, col = random.choice(empty_grids)
-                    self.entries[row][col].delete(0, tk.END)
-                    self.entries[row][col].insert(0, self.ANSWERS_GRID[row][col])
-                    self.entries[row][col].config(state="readonly")
-                    self.EDITABLE_GRID[row][col] = 1
+                    deduction, steps = self.hint_engine.next_placement()
+                    if (deduction is not None):
+                        row, col = divmod(deduction.cell, self.GRID_SIZE)
+                        message = "\n".join(self.hint_engine.explain(step) for step in steps + [deduction])
+                    else:
+                        # Nothing left but guessing, reveal a random cell as before
+                        row, col = random.choice(empty_grids)
+                        message = f"No logical step left, row {row + 1}, column {col + 1} is revealed."
+                    self.board.set(row, col, self.board.answers[self.board.index(row, col)])
+                    self.board.lock(row, col)
+                    self.sync_entries()
                     self.hint_count += 1
+                    self.autosave_cell(self.board.index(row, col))
+                    self.autosave.record_hints(self.hint_count, self.max_hint)
                     self.update_progress()
+                    self.move_grid(row, col)
+                    messagebox.showinfo("Hint", message)
                 if (self.hint_count >= self.max_hint):
                     self.game_buttons["hint_button"].config(state="disabled")
             self.bind_entry_events() 
 
     def reset_grid(self):
     # Clear the grid for a new game
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                self.entries[row][col].config(state="normal", fg="black")  
-                self.entries[row][col].delete(0, tk.END)
-                self.ANSWERS_GRID[row][col] = 0
+        self.board.clear()
+        self.hint_engine = None
+        self.history = None
+        self.sync_entries()
         self.progress_percentage = 0
         self.progress_label.config(text=f"Progress : {self.progress_percentage:.2f}%")
         self.progress_bar["value"] = self.progress_percentage  
@@ -177,180 +260,171 @@ class SudokuGame:
 
     def is_grid_empty(self):
     # Check if all cells are empty
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                if self.entries[(row, col)].get() != "":
-                    return False
-        return True
+        return not any(self.board.cells)
 
     def check_win(self):
     # Check if the current grid is a valid Sudoku solution
-        valid_nums = set(str(i) for i in range(1, self.GRID_SIZE + 1))
-        for row in range(self.GRID_SIZE):
-            row_nums = set()
-            col_nums = set()
-            for col in range(self.GRID_SIZE):
-                row_val = self.entries[row][col].get()
-                col_val = self.entries[col][row].get()  
-                if (row_val not in valid_nums or row_val in row_nums): 
-                    return False  
-                if (col_val not in valid_nums or col_val in col_nums):
-                    return False  
-                row_nums.add(row_val)
-                col_nums.add(col_val)
-        # Check 3x3 blocks
-        for block_row in range(0, self.GRID_SIZE, self.MINI_GRID_SIZE):
-            for block_col in range(0, self.GRID_SIZE, self.MINI_GRID_SIZE):
-                block_nums = set()
-                for i in range(self.MINI_GRID_SIZE):
-                    for j in range(self.MINI_GRID_SIZE):
-                        block_val = self.entries[block_row + i][block_col + j].get()
-                        if block_val in block_nums or block_val not in valid_nums:
-                            return False  # Duplicates in block
-                        block_nums.add(block_val)
-        return True 
+        return self.board.check_win()
 
+    @monitor.timed("check_completion")
     def check_completion(self):
     # Check if the puzzle is complete and display win message
         if (self.check_win()):
-            for row in range(self.GRID_SIZE):
-                for col in range(self.GRID_SIZE):
-                    self.entries[row][col].config(fg="black")
+            for entries in self.entries:
+                for entry in entries:
+                    entry.config(fg="black")
+            self.autosave.discard()
             messagebox.showinfo("Victory", "You solved the puzzle!")
             self.progress_label.config(text=f"Progress : {100:.2f}%")
             self.game_buttons["reveal_button"].config(text="Clear", command=self.reset_grid)
             self.game_buttons["save_button"].config(state="disabled")
             # Clear grid
 
+    @monitor.timed("on_entry_change")
     def on_entry_change(self, event):
         # Get the row and column of the entry that triggered the event
-        if (self.is_revealed):
-            return
         grid_input = event.widget
-        is_found = False
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                if (self.entries[row][col] == grid_input):
-                    is_found = True
-                    break
-            if (is_found):
-                break      
-        if (self.ANSWERS_GRID[row][col] != 0 and self.EDITABLE_GRID[row][col] == 0):
-            # Check answer on each grid
-            pass
-            #if (grid_input.get().isdigit()):
-                #if (grid_input.get() == str(self.ANSWERS_GRID[row][col])):
-                    #grid_input.config(fg="green")  # Correct answer     
-                #else:
-                    #grid_input.config(fg="red")    # Incorrect answer
-            #else:
-                #grid_input.config(fg="black")  # Reset color if entry is empty or invalid
+        if (self.is_revealed or grid_input not in self.entry_cells):
+            return
+        row, col = self.entry_cells[grid_input]
+        if (not self.is_entry_events_bound):
+            # No game yet (or it is still generating): the board ignores the digit, so the entry must not keep it
+            i = self.board.index(row, col)
+            self.grid_widgets[self.grid_key()]["shown"][i] = None # Force update_entry to rewrite it
+            self.update_entry(i)
+            return
+        value = grid_input.get()
+        num = int(value) if value.isdigit() else 0
+        old = self.board.get(row, col)
+        if (not self.board.set(row, col, num)):
+            return # Arrow keys, locked cells: nothing to record or save
+        self.edit_history().record(self.board.index(row, col), old, num)
+        self.grid_widgets[self.grid_key()]["shown"][self.board.index(row, col)] = num # The entry already shows it
+        self.sync_entries() # Recolor only the cells whose conflict state changed
+        self.autosave_cell(self.board.index(row, col))
         self.update_progress()                   
         self.check_completion()
 
+    @monitor.timed("on_canvas_input")
+    def on_canvas_input(self, row, col, num):
+    # Number typed on the canvas board
+        if (self.is_revealed or not self.is_entry_events_bound or not self.board.is_editable(row, col)):
+            return
+        old = self.board.get(row, col)
+        if (not self.board.set(row, col, num)):
+            return
+        self.edit_history().record(self.board.index(row, col), old, num)
+        self.sync_entries()
+        self.autosave_cell(self.board.index(row, col))
+        self.update_progress()
+        self.check_completion()
+
+    def edit_history(self):
+    # History of the current board (a new one after a new game or load)
+        if (self.history is None or self.history.board is not self.board):
+            self.history = EditHistory(self.board)
+        return self.history
+
+    def undo(self):
+    # Take back the last number typed
+        if (self.is_revealed or not self.is_entry_events_bound or self.history is None):
+            return
+        i = self.history.undo()
+        if (i is not None):
+            self.after_history_step(i)
+
+    def redo(self):
+        if (self.is_revealed or not self.is_entry_events_bound or self.history is None):
+            return
+        i = self.history.redo()
+        if (i is not None):
+            self.after_history_step(i)
+
+    def after_history_step(self, i):
+        self.sync_entries()
+        self.autosave_cell(i)
+        self.update_progress()
+        self.move_grid(*divmod(i, self.GRID_SIZE))
+        self.check_completion()
+
+    def saved_game(self):
+        return SavedGame(self.board, self.hint_count, self.max_hint, self.num_to_remove)
+
+    def autosave_cell(self, i):
+    # Journal one changed cell, with a fresh snapshot once the journal has grown
+        self.autosave.record_cell(self.board, i)
+        if (self.autosave.needs_compaction()):
+            self.autosave.snapshot(self.saved_game())
+
+    def restore_session(self):
+    # Offer the game that was open when the program last closed (or crashed), True when it was opened
+        saved = self.autosave.recover()
+        if (saved is None):
+            return False
+        if (messagebox.askyesno("Restore", "Continue your last game?")):
+            self.open_game(saved)
+            return True
+        self.autosave.discard()
+        return False
+
+    @monitor.timed("start_session")
+    def start_session(self):
+    # First grid, built once the window is up: the restored game (only its size is built) or an empty 9x9 grid
+        if (not self.restore_session()):
+            self.create_grid(self.top_frame)
+
     def instruction(self): 
         # Show game instruction
         messagebox.showinfo("Instruction","How to play Sudoku\n"
         "1. Fill in the grid so that each row, column, and 3x3 block contains the numbers 1-9.\n"
         "2. You can only place numbers 1-9 in each empty cell\n"
         "3. You cannot edit cells that locked\n"
+        "4. Ctrl+Z undoes your last number, Ctrl+Y redoes it\n"
         "                                  Have fun!                                            ")
 
+    @monitor.timed("update_progress")
     def update_progress(self):
-        correct_grids = 0
+        correct_grids = self.board.count_correct()
         total_grids = self.num_to_remove - self.hint_count
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                if (self.entries[row][col].get() == str(self.ANSWERS_GRID[row][col]) and self.EDITABLE_GRID[row][col] == 0):
-                    correct_grids += 1
-        game_progress = correct_grids / total_grids
         if (total_grids > 0):
-            progress_percentage = game_progress * 100  
-            self.progress_bar["value"] = progress_percentage
+            progress_percentage = correct_grids / total_grids * 100  
         else:
-            self.progress_bar["value"] = 100
+            progress_percentage = 100
+        self.progress_bar["value"] = progress_percentage
         self.progress_label.config(text=f"Progress : {progress_percentage:.2f}%")
 
     def save_game(self): 
-    # Save game data
+    # Save game data (.sdb = compact binary, otherwise text)
+        from tkinter import filedialog  # Loaded on first use, not at startup
         file_path = filedialog.asksaveasfilename(defaultextension=".dat",
                                                     filetypes=[("Data Files", "*.dat"),
+                                                                ("Binary Save Files", "*.sdb"),
                                                                 ("Text Files", "*.txt"),
                                                                 ("All Files", "*.*")])
         try:
             if (file_path):
-                with open(file_path, "w") as f:
-                    f.write(f"Grid Size : {self.GRID_SIZE}\n")
-                    f.write(f"Mini Grid Size : {self.MINI_GRID_SIZE}\n")
-                    f.write("Saved grid\n")
-                    self.save_grid(f)
-                    f.write("Editable\n")
-                    self.save_editable_state(f)
-                    f.write("Answer\n")
-                    self.save_answers_grid(f)
-                    f.write(f"Hints {self.hint_count}/{self.max_hint}\n")
-                    f.write(f"Difficulty : {self.num_to_remove - self.hint_count}")                
+                with monitor.measure("save_game"):
+                    save_game_file(file_path, self.saved_game())
                 messagebox.showinfo("Save Game", "Game has been saved.")
             else:
                 return    
         except Exception as e:
             messagebox.showerror("Save Game", f"An error occurred while saving: {e}")
 
-    def save_grid(self, file):
-        # Save progress
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                save_value = self.entries[row][col].get() or "0"
-                file.write(save_value + " ")
-            file.write("\n")
-
-    def save_editable_state(self, file):
-        # Save editable state
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                save_edit = str(self.EDITABLE_GRID[row][col]) 
-                file.write(save_edit + " ")
-            file.write("\n")    
-
-    def save_answers_grid(self, file):
-        # Save answers
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                save_value = str(self.ANSWERS_GRID[row][col])
-                file.write(save_value + " ")
-            file.write("\n")
-
     def load_game(self): 
     # Load game data 
+        from tkinter import filedialog
         file_path = filedialog.askopenfilename(filetypes=[("Data Files", "*.dat"),
+                                                        ("Binary Save Files", "*.sdb"),
                                                         ("Text Files", "*.txt"), 
                                                         ("All Files", "*.*")])
         try:
             if (file_path):
                 # If you confirm to load
-                with open(file_path, "r") as f:
-                    self.GRID_SIZE = int(f.readline().split(" : ")[1])
-                    self.MINI_GRID_SIZE = int(f.readline().split(" : ")[1])# Read grid size
-                    self.resize_grid()  # Resize grid based on loaded size
-                    self.recreate_grid()  # Recreate grid widgets for new size
-                    self.reset_grid()  # Clear the existing grid
-                    f.readline()
-                    self.load_grid(f)
-                    f.readline()
-                    self.load_edit_state(f)    
-                    f.readline()
-                    self.load_answers_grid(f)
-                    self.bind_entry_events()
-                    self.load_hint(f)
-                    self.num_to_remove = int(f.readline().split(" : ")[1])
-                    self.load_progress()
+                with monitor.measure("load_game"):
+                    saved = load_game_file(file_path)
+                self.open_game(saved)
                 messagebox.showinfo("Load Game", "Game successfully loaded.")
-                self.game_buttons["save_button"].config(state="normal")
-                self.game_buttons["load_button"].config(state="normal")
-                self.game_buttons["reveal_button"].config(state="normal")
-                self.game_buttons["appearance"].config(state="disabled")
-                if (self.hint_count < self.max_hint):
-                    self.game_buttons["hint_button"].config(state="normal") 
             else:
                 return        
         except FileNotFoundError:
@@ -358,39 +432,31 @@ class SudokuGame:
         except Exception as e:
             messagebox.showerror("Load Game", f"An error occurred while loading: {e}")
 
-    def load_grid(self, file):
-        # Load saved grid
-        for row in range(self.GRID_SIZE):
-            line = file.readline().strip().split()
-            for col in range(self.GRID_SIZE):
-                value = line[col]
-                self.entries[row][col].delete(0, tk.END) 
-                if (value != "0"):
-                    self.entries[row][col].insert(0, value)
-
-    def load_edit_state(self, file):
-        # Load editable state 
-        for row in range(self.GRID_SIZE):
-            line = file.readline().strip().split()
-            for col in range(self.GRID_SIZE):
-                editable_value = int(line[col])
-                self.EDITABLE_GRID[row][col] = editable_value
-                if (editable_value) == 1:  
-                    self.entries[row][col].config(state="readonly")
-                else:
-                    self.entries[row][col].config(state="normal")
-
-    def load_answers_grid(self, file):
-        # Load answers
-        for row in range(self.GRID_SIZE):
-            line = file.readline().strip().split()
-            for col in range(self.GRID_SIZE):
-                self.ANSWERS_GRID[row][col] = int(line[col])   
+    def open_game(self, saved):
+    # Show a loaded or restored game
+        self.is_revealed = False
+        self.GRID_SIZE = saved.board.grid_size
+        self.MINI_GRID_SIZE = saved.board.mini_grid_size # Read grid size
+        self.resize_grid()  # Resize grid based on loaded size
+        self.recreate_grid()  # Recreate grid widgets for new size
+        self.reset_grid()  # Clear the existing grid
+        self.board = saved.board
+        self.refresh_entries()
+        self.bind_entry_events()
+        self.load_hint(saved)
+        self.num_to_remove = saved.num_to_remove
+        self.load_progress()
+        self.autosave.snapshot(self.saved_game())
+        self.game_buttons["save_button"].config(state="normal")
+        self.game_buttons["load_button"].config(state="normal")
+        self.game_buttons["reveal_button"].config(state="normal")
+        self.game_buttons["appearance"].config(state="disabled")
+        if (self.hint_count < self.max_hint):
+            self.game_buttons["hint_button"].config(state="normal") 
 
-    def load_hint(self, file):
+    def load_hint(self, saved):
         # Load and update hint and max hints
-        hint_line = file.readline().strip().split()
-        self.hint_count, self.max_hint = map(int, hint_line[1].split("/"))
+        self.hint_count, self.max_hint = saved.hint_count, saved.max_hint
         if (self.hint_count >= self.max_hint):
             self.game_buttons["reveal_button"].config(state="disabled")
     def load_progress(self):
@@ -428,13 +494,11 @@ class SudokuGame:
     def reveal_grid(self):
         if (messagebox.askyesno("Reveal", "Are you sure to reveal and end the game?")):
             # Reveal correct answer
-            for row in range(self.GRID_SIZE):
-                for col in range(self.GRID_SIZE):
-                    self.entries[row][col].config(state="normal")  # Make editable
-                    self.entries[row][col].delete(0, tk.END)
-                    self.entries[row][col].insert(0, self.ANSWERS_GRID[row][col])  # Insert the original number
-                    self.entries[row][col].config(state="readonly")
-                    self.entries[row][col].config(fg="black")  # Lock after revealing
+            if (not self.ensure_answers()):
+                return
+            self.board.reveal() # Insert the original numbers and lock every cell
+            self.autosave.discard()
+            self.sync_entries()
             self.progress_bar["value"] = 0        
             self.progress_label.config(text=f"Progress : -.--%")
             self.game_buttons["reveal_button"].config(state="disabled") # Disable "Reveal" button
@@ -445,28 +509,88 @@ class SudokuGame:
             return
 
     def bind_entry_events(self):
-    # Bind key release event to each entry widget to check for completion
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                if (not self.entries[row][col].bind("<KeyRelease>")):
-                    self.entries[row][col].bind("<KeyRelease>", self.on_entry_change)       
+    # Start checking for completion on key release (bound once for every cell through the "SudokuCell" tag)
+        self.is_entry_events_bound = True
 
-    def random_mode(self):
-    # Random mode (Reset grid then generate new Sudoku)
+    @monitor.timed("random_mode")
+    def random_mode(self, remove_grid_count, mode, difficulty=None):
+    # Random mode (Reset grid then take a ready puzzle from the pool, or generate one on a worker thread)
+        monitor.start_profile() # Only when a capture of the next new game was asked for
         self.is_revealed = False
         self.resize_grid()
         self.recreate_grid() # Recreate the grid
         self.reset_grid()
-        self.fill_grid() 
-        # Save the fully solved grid before removing any numbers
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                self.ANSWERS_GRID[row][col] = int(self.entries[row][col].get())  # Save the number in the answers grid
+        if (difficulty is not None and self.unique_puzzles):
+            ready = self.puzzle_pool.take(self.GRID_SIZE, difficulty)
+            if (ready is not None):
+                self.start_game(ready[0], ready[1], mode)
+                return
+        self.puzzle_pool.pause() # Refilling at the same time would double the wait for this puzzle
+        self.is_entry_events_bound = False # The empty grid takes no numbers until the puzzle arrives
+        self.generation_cancel = threading.Event()
+        self.generation_results = queue.Queue()
+        worker = threading.Thread(target=self.generation_worker, daemon=True,
+                                  args=(self.GRID_SIZE, self.MINI_GRID_SIZE, remove_grid_count, self.unique_puzzles,
+                                        self.generation_cancel, self.generation_results))
+        self.game_buttons["new_game_button"].config(text="Cancel", state="normal", command=self.cancel_generation)
+        for button in ("load_button", "save_button", "hint_button", "appearance"):
+            self.game_buttons[button].config(state="disabled")
+        self.progress_label.config(text="Generating...")
+        worker.start()
+        self.root.after(50, self.poll_generation, mode)
+
+    def generation_worker(self, grid_size, mini_grid_size, remove_grid_count, unique, cancel, results):
+    # Runs off the Tk thread: only pure data goes in and out, through the results queue
+        try:
+            generator = SudokuGenerator(grid_size, mini_grid_size, random.Random())
+            generator.fill_grid = monitor.timed("fill_grid")(generator.fill_grid)
+            with monitor.thread_profile(), monitor.measure("generate"):
+                puzzle, solution = generator.generate(remove_grid_count, unique, cancel=cancel,
+                                                      progress=lambda checked, total: results.put(("progress", checked / total * 100)))
+            results.put(("done", puzzle, solution))
+        except Exception as e:
+            results.put(("error", e))
+
+    def poll_generation(self, mode):
+    # Check the worker from the Tk thread
+        try:
+            while True:
+                message = self.generation_results.get_nowait()
+                if (message[0] == "progress"):
+                    self.progress_bar["value"] = message[1]
+                    continue
+                self.puzzle_pool.resume()
+                self.game_buttons["new_game_button"].config(text="New game", state="normal", command=self.new_game_setting)
+                self.game_buttons["load_button"].config(state="normal")
+                self.progress_bar["value"] = 0
+                self.progress_label.config(text=f"Progress : {0:.2f}%")
+                if (message[0] == "error"):
+                    messagebox.showerror("New Game", f"An error occurred while generating: {message[1]}")
+                    self.game_buttons["appearance"].config(state="normal")
+                elif (message[1] is not None and not self.generation_cancel.is_set()):
+                    self.start_game(message[1], message[2], mode)
+                else:
+                    self.game_buttons["appearance"].config(state="normal")
+                monitor.stop_profile()
+                return
+        except queue.Empty:
+            self.root.after(50, self.poll_generation, mode)
+
+    def start_game(self, puzzle, solution, mode):
+    # Show a ready puzzle and enable the game buttons
+        self.board.load_answers(solution) # Save the fully solved grid
+        self.remove_numbers(puzzle, mode)
         self.bind_entry_events()
-        self.game_buttons["new_game_button"].config(state="normal") 
         self.game_buttons["reveal_button"].config(state="normal")  
         self.game_buttons["save_button"].config(state="normal")
         self.game_buttons["appearance"].config(state="disabled")
+        self.autosave.snapshot(self.saved_game())
+        monitor.stop_profile() # End of a captured new game (no-op otherwise)
+
+    def cancel_generation(self):
+    # Stop the worker, the grid stays empty
+        self.generation_cancel.set()
+        self.game_buttons["new_game_button"].config(state="disabled")
 
     def custom_mode(self):
     # Custom mode (Input a hint and a number of grids to be removed)
@@ -476,7 +600,7 @@ class SudokuGame:
         custom_mode_window.title("Custom Mode")
         custom_mode_window.protocol("WM_DELETE_WINDOW", lambda: [self.close_window(), custom_mode_window.destroy()])
         def entry_check(char):
-            if ((char.isdigit() or char == "") and (len(char) <= 3)):
+            if ((char.isdigit() or char == "") and (len(char) <= len(str(self.GRID_SIZE * self.GRID_SIZE)))):
                 return True   
             return False
         def get_remove_number():
@@ -485,8 +609,7 @@ class SudokuGame:
                 self.max_hint = int(hint_entry.get())
                 if (0 < remove_grid_count < self.GRID_SIZE * self.GRID_SIZE):
                     if (self.max_hint < remove_grid_count):
-                        self.random_mode()
-                        self.remove_numbers(remove_grid_count, "custommode")
+                        self.random_mode(remove_grid_count, "custommode")
                         custom_mode_window.destroy()
                     else:
                         messagebox.showwarning("Error", f"Please enter hints lower than {remove_grid_count}")
@@ -507,18 +630,8 @@ class SudokuGame:
         confirm_button.pack(pady=self.button_pad_y * 2)
 
     def difficulty_select(self):
-        if (self.GRID_SIZE == 4 or self.GRID_SIZE == 9 or self.GRID_SIZE == 16 or self.GRID_SIZE == 25): 
-            removed_grid_limit = (self.GRID_SIZE ** 2) - 1 
-            easy_mode_range = (int(removed_grid_limit * (25 / 100)), int(removed_grid_limit * (35 / 100) - 1))
-            medium_mode_range = (int(easy_mode_range[1] + 1), int(removed_grid_limit * (45 / 100) - 1))
-            hard_mode_range = (int(medium_mode_range[1] + 1), int(removed_grid_limit * (60 / 100) - 1))
-            extreme_mode_range = (int(hard_mode_range[1] + 1), int(removed_grid_limit * (80 / 100)))
-            random_mode_range = (easy_mode_range[0], extreme_mode_range[1])
-            difficulty_name = [(f"Easy", easy_mode_range),
-                               (f"Medium", medium_mode_range),
-                               (f"Hard", hard_mode_range),
-                               (f"Extreme", extreme_mode_range),
-                               (f"Random", random_mode_range)]
+        if (self.GRID_SIZE in GRID_SIZES): 
+            difficulty_name = difficulty_ranges(self.GRID_SIZE)
         else:
             messagebox.showwarning("Error", "Please select a valid grid size before choosing difficulty.")
             return
@@ -530,8 +643,7 @@ class SudokuGame:
         difficulty_select_label= tk.Label(difficulty_select_window, text="Choose difficulty", font=("Arial", self.font_size + 8))
         difficulty_select_label.grid(row=0, column=0, columnspan=2, padx=30, pady=20)
         for i, (label, difficulty_range) in enumerate(difficulty_name):
-            difficulty_button = tk.Button(difficulty_select_window, text=label, font=("Arial", self.font_size * 2), command=lambda range = difficulty_range:[self.random_mode(),
-                                                                                                self.remove_numbers(random.randint(int(range[0]), int(range[1])), "randommode"),
+            difficulty_button = tk.Button(difficulty_select_window, text=label, font=("Arial", self.font_size * 2), command=lambda label = label, range = difficulty_range:[self.random_mode(random.randint(int(range[0]), int(range[1])), "randommode", label),
                                                                                                 difficulty_select_window.destroy()])
             difficulty_button.grid(row=(1 + i // 2), column=(i % 2), padx=30, pady=10)
 
@@ -541,12 +653,18 @@ class SudokuGame:
 
     def exit_game(self):
     # Exit game
-        is_quit = messagebox.askyesno("Quit", "Are you sure to quit?\nYour game progress will not be saved.")
+        is_quit = messagebox.askyesno("Quit", "Are you sure to quit?\nYour game will be offered again next time.")
         if (is_quit):
-            self.root.destroy()
+            self.close()
         else:
             return
 
+    def close(self):
+    # Write the puzzle pool and the autosave journal, then close the window
+        self.puzzle_pool.close()
+        self.autosave.close()
+        self.root.destroy()
+
     def new_game_setting(self):
     # Choose to remove random or custom numbers to be removed
         self.game_buttons["new_game_button"].config(state="disabled")
@@ -555,13 +673,16 @@ class SudokuGame:
         grid_size_selection.resizable(False, False)
         grid_size_selection.title("Grid Size Selection")
         grid_size_selection_label = tk.Label(grid_size_selection, text="Choose grid size", font=("Arial", self.font_size + 8))
-        grid_size_buttons = [tk.Button(grid_size_selection, text="4x4", font=("Arial", self.font_size * 2), command=lambda:[setattr(self, "GRID_SIZE", 4), setattr(self, "MINI_GRID_SIZE", 2), grid_size_selection.destroy(), mode_selection()]),
-                             tk.Button(grid_size_selection, text="9x9", font=("Arial", self.font_size * 2), command=lambda:[setattr(self, "GRID_SIZE", 9), setattr(self, "MINI_GRID_SIZE", 3), grid_size_selection.destroy(), mode_selection()]),
-                             tk.Button(grid_size_selection, text="16x16", font=("Arial", self.font_size * 2), command=lambda:[setattr(self, "GRID_SIZE", 16), setattr(self, "MINI_GRID_SIZE", 4), grid_size_selection.destroy(), mode_selection()]),
-                             tk.Button(grid_size_selection, text="25x25", font=("Arial", self.font_size * 2), command=lambda:[setattr(self, "GRID_SIZE", 25), setattr(self, "MINI_GRID_SIZE", 5), grid_size_selection.destroy(), mode_selection()], state="disabled")]
+        grid_size_frame = tk.Frame(grid_size_selection)
+        for k, (grid_size, mini_grid_size) in enumerate(GRID_SIZES.items()):
+            # Two columns, boxes that are not square show their shape (6x6 has 2x3 boxes)
+            box_width = grid_size // mini_grid_size
+            text = f"{grid_size}x{grid_size}" if box_width == mini_grid_size else f"{grid_size}x{grid_size} ({mini_grid_size}x{box_width})"
+            button = tk.Button(grid_size_frame, text=text, font=("Arial", self.font_size * 2),
+                               command=lambda grid_size=grid_size, mini_grid_size=mini_grid_size:[setattr(self, "GRID_SIZE", grid_size), setattr(self, "MINI_GRID_SIZE", mini_grid_size), grid_size_selection.destroy(), mode_selection()])
+            button.grid(row=k // 2, column=k % 2, padx=10, pady=self.button_pad_y, sticky="ew")
         grid_size_selection_label.pack(pady=self.button_pad_y * 2)
-        for button in grid_size_buttons:
-            button.pack(pady=self.button_pad_y)
+        grid_size_frame.pack()
         grid_size_selection.protocol("WM_DELETE_WINDOW", lambda: [self.close_window(), grid_size_selection.destroy()])
         def mode_selection():
             grid_size_selection.destroy()
@@ -591,12 +712,18 @@ class SudokuGame:
         color_listbox = tk.Listbox(change_appearence_window, font=("Arial", self.font_size * 2), selectmode="multiple", height=len(colors))
         for color in colors:
             color_listbox.insert(tk.END, color)
+        renderer = tk.StringVar(value=self.grid_renderer)
+        renderer_frame = tk.Frame(change_appearence_window)
+        for text, value in [("Auto", "auto"), ("Entries", "entries"), ("Canvas", "canvas")]:
+            tk.Radiobutton(renderer_frame, text=text, value=value, variable=renderer, font=("Arial", self.font_size * 2)).pack(side="left")
         def apply_colors():
             try:
                 color_selection = color_listbox.curselection()
-                if (len(color_selection) == 2):
-                    self.primary_color = color_listbox.get(color_selection[0])
-                    self.secondary_color = color_listbox.get(color_selection[1])
+                if (len(color_selection) in (0, 2)): # No selection keeps the colors
+                    if (color_selection):
+                        self.primary_color = color_listbox.get(color_selection[0])
+                        self.secondary_color = color_listbox.get(color_selection[1])
+                    self.grid_renderer = renderer.get()
                     self.recreate_grid()
                     change_appearence_window.destroy()
                 else:
@@ -606,6 +733,7 @@ class SudokuGame:
 
         color_label.pack(pady=self.button_pad_y)
         color_listbox.pack(pady=self.button_pad_y)
+        renderer_frame.pack(pady=self.button_pad_y)
         apply_button = tk.Button(change_appearence_window, text="Apply", font=("Arial", self.font_size * 2), command=apply_colors)
         apply_button.pack(pady=self.button_pad_y)
         change_appearence_window.protocol("WM_DELETE_WINDOW", lambda: [self.close_window(), change_appearence_window.destroy()])
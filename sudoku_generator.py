@@ -0,0 +1,221 @@
+from array import array
+import random
+from sudoku_geometry import geometry
+
+class SudokuGenerator:
+    # Fill grids with row/column/box candidate bitmasks (bit num - 1 = number num),
+    # naked/hidden singles propagation and most-constrained-cell backtracking
+    def __init__(self, grid_size=9, mini_grid_size=3, rng=random):
+        self.grid_size = grid_size
+        self.mini_grid_size = mini_grid_size
+        self.cell_count = grid_size * grid_size
+        self.full_mask = (1 << grid_size) - 1
+        self.rng = rng
+        self.geometry = geometry(grid_size, mini_grid_size)  # Shared with every engine of this grid size
+        self.cell_row, self.cell_col, self.cell_box = self.geometry.cell_row, self.geometry.cell_col, self.geometry.cell_box
+        self.units = self.geometry.units
+
+    def _reset(self, cells):
+        # Load a board into the search state, False if it already breaks a rule
+        size = self.grid_size
+        self.cells = list(cells)
+        self.row_used, self.col_used, self.box_used = [0] * size, [0] * size, [0] * size
+        self.trail = []  # Cells placed by the search, used to undo
+        for i, num in enumerate(self.cells):
+            if (num):
+                bit = 1 << (num - 1)
+                r, c, b = self.cell_row[i], self.cell_col[i], self.cell_box[i]
+                if ((self.row_used[r] | self.col_used[c] | self.box_used[b]) & bit):
+                    return False
+                self.row_used[r] |= bit
+                self.col_used[c] |= bit
+                self.box_used[b] |= bit
+        return True
+
+    def _place(self, i, num):
+        bit = 1 << (num - 1)
+        self.cells[i] = num
+        self.row_used[self.cell_row[i]] |= bit
+        self.col_used[self.cell_col[i]] |= bit
+        self.box_used[self.cell_box[i]] |= bit
+        self.trail.append(i)
+
+    def _undo(self, mark):
+        # Remove every number placed after the trail reached mark
+        cells, trail = self.cells, self.trail
+        while len(trail) > mark:
+            i = trail.pop()
+            bit = ~(1 << (cells[i] - 1))
+            cells[i] = 0
+            self.row_used[self.cell_row[i]] &= bit
+            self.col_used[self.cell_col[i]] &= bit
+            self.box_used[self.cell_box[i]] &= bit
+
+    def candidates(self, i):
+        return self.full_mask & ~(self.row_used[self.cell_row[i]] | self.col_used[self.cell_col[i]] | self.box_used[self.cell_box[i]])
+
+    def _propagate(self):
+        # Place naked and hidden singles until nothing changes, False on a contradiction
+        cells, full = self.cells, self.full_mask
+        row_used, col_used, box_used = self.row_used, self.col_used, self.box_used
+        cell_row, cell_col, cell_box = self.cell_row, self.cell_col, self.cell_box
+        while True:
+            changed = False
+            for i in range(self.cell_count):
+                if (cells[i] == 0):
+                    cand = full & ~(row_used[cell_row[i]] | col_used[cell_col[i]] | box_used[cell_box[i]])
+                    if (not cand):
+                        return False
+                    if (cand & (cand - 1) == 0):
+                        self._place(i, cand.bit_length())
+                        changed = True
+            for unit in self.units:
+                once = twice = used = 0
+                for i in unit:
+                    if (cells[i]):
+                        used |= 1 << (cells[i] - 1)
+                    else:
+                        cand = full & ~(row_used[cell_row[i]] | col_used[cell_col[i]] | box_used[cell_box[i]])
+                        twice |= once & cand
+                        once |= cand
+                if ((once | used) != full):
+                    return False  # Some number has no place left in this unit
+                hidden = once & ~twice
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for i in unit:
+                        if (cells[i] == 0 and self.candidates(i) & bit):
+                            self._place(i, bit.bit_length())
+                            changed = True
+                            break
+            if (not changed):
+                return True
+
+    def _pick_cell(self):
+        # Most constrained empty cell, None when the grid is full
+        cells, best, best_count = self.cells, None, self.grid_size + 1
+        for i in range(self.cell_count):
+            if (cells[i] == 0):
+                count = self.candidates(i).bit_count()
+                if (count < best_count):
+                    best, best_count = i, count
+                    if (count <= 2):
+                        break
+        return best
+
+    def solutions(self, cells, shuffle=True, max_guesses=None, cancel=None):
+        # Yield each solution of cells as an array, stop after max_guesses wrong branches (or once cancel is set)
+        if (not self._reset(cells) or not self._propagate()):
+            return
+        stack = []
+        self.guesses = 0
+        while True:
+            cell = self._pick_cell()
+            if (cell is None):
+                yield array("B", self.cells)
+            else:
+                cand = self.candidates(cell)
+                digits = [num for num in range(1, self.grid_size + 1) if cand >> (num - 1) & 1]
+                if (shuffle):
+                    self.rng.shuffle(digits)
+                stack.append((len(self.trail), cell, digits))
+            while stack:
+                mark, cell, digits = stack[-1]
+                self._undo(mark)
+                if (not digits):
+                    stack.pop()
+                    continue
+                self.guesses += 1
+                if (max_guesses is not None and self.guesses > max_guesses):
+                    return
+                if (cancel is not None and cancel.is_set()):
+                    return
+                self._place(cell, digits.pop())
+                if (self._propagate()):
+                    break
+            else:
+                return
+
+    def seed_diagonal_boxes(self):
+        # Diagonal boxes never share a row or column, so each gets a random permutation
+        size, height, width = self.grid_size, self.mini_grid_size, self.geometry.box_width
+        cells = [0] * self.cell_count
+        for box in range(min(height, width)):
+            nums = list(range(1, size + 1))
+            self.rng.shuffle(nums)
+            for k, num in enumerate(nums):
+                cells[(box * height + k // width) * size + box * width + k % width] = num
+        return cells
+
+    def fill_grid(self, cancel=None):
+        # Return a random complete grid, restarting when a search runs too long (None once cancel is set)
+        max_guesses = self.cell_count
+        while cancel is None or not cancel.is_set():
+            for solution in self.solutions(self.seed_diagonal_boxes(), max_guesses=max_guesses, cancel=cancel):
+                return solution
+            max_guesses *= 2
+        return None
+
+    def count_solutions(self, cells, limit=2, max_guesses=None):
+        # Count solutions of cells, stopping as soon as limit is reached
+        # (None if max_guesses ran out before the count was known)
+        count = 0
+        self.guesses = 0
+        for _ in self.solutions(cells, shuffle=False, max_guesses=max_guesses):
+            count += 1
+            if (count >= limit):
+                return count
+        if (max_guesses is not None and self.guesses > max_guesses):
+            return None
+        return count
+
+    def _forced(self, cells, i, num):
+        # True when empty cell i can only take num (a naked or hidden single), so removing it keeps one solution
+        peers = self.geometry.peers
+        used = 0
+        for p in peers[i]:
+            used |= 1 << (cells[p] - 1) if cells[p] else 0
+        if ((self.full_mask & ~used).bit_count() == 1):
+            return True
+        for unit in self.geometry.cell_units[i]:
+            # Every other empty cell of the unit sees num already
+            if (all(cells[j] or j == i or any(cells[p] == num for p in peers[j]) for j in self.units[unit])):
+                return True
+        return False
+
+    def carve(self, solution, remove_grid_count, max_guesses=4, progress=None, cancel=None):
+        # Remove up to remove_grid_count numbers, only where the puzzle stays unique.
+        # Cells whose check runs past max_guesses are kept, so the result is still unique.
+        # progress(checked, cell_count) is called after each cell, a set cancel event returns None
+        cells = list(solution)
+        order = list(range(self.cell_count))
+        self.rng.shuffle(order)
+        removed = 0
+        for checked, i in enumerate(order):
+            if (removed >= remove_grid_count):
+                break
+            if (cancel is not None and cancel.is_set()):
+                return None
+            if (progress is not None):
+                progress(checked, self.cell_count)
+            num, cells[i] = cells[i], 0
+            if (self._forced(cells, i, num) or self.count_solutions(cells, max_guesses=max_guesses) == 1):
+                removed += 1
+            else:
+                cells[i] = num
+        return array("B", cells)
+
+    def generate(self, remove_grid_count, unique=True, progress=None, cancel=None):
+        # Return (puzzle, solution) for a fresh random grid (puzzle is None when cancelled)
+        solution = self.fill_grid(cancel)
+        if (solution is None):
+            return None, None
+        if (unique):
+            return self.carve(solution, remove_grid_count, progress=progress, cancel=cancel), solution
+        puzzle = array("B", solution)
+        order = list(range(self.cell_count))
+        self.rng.shuffle(order)
+        for i in order[:remove_grid_count]:
+            puzzle[i] = 0
+        return puzzle, solution
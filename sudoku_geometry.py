@@ -0,0 +1,49 @@
+from functools import lru_cache
+import math
+
+def box_height(grid_size):
+    # Rows per box of a grid size: the largest divisor not above its square root (9 -> 3, 6 -> 2, 12 -> 3)
+    return max(d for d in range(1, math.isqrt(grid_size) + 1) if grid_size % d == 0)
+
+class Geometry:
+    # Index tables of one grid size, built once and shared by every engine (see geometry()).
+    # Cells are numbered row by row, units are the rows, then the columns, then the boxes.
+    # A box is mini_grid_size rows by box_width = grid_size // mini_grid_size columns (2x3 boxes on 6x6)
+    __slots__ = ("grid_size", "mini_grid_size", "box_width", "cell_count", "full_mask",
+                 "cell_row", "cell_col", "cell_box", "units", "rows", "cols", "boxes", "cell_units", "peers")
+
+    def __init__(self, grid_size, mini_grid_size):
+        if (mini_grid_size < 1 or grid_size % mini_grid_size):
+            raise ValueError(f"{grid_size}x{grid_size} grid cannot be split into boxes of {mini_grid_size} rows")
+        size = grid_size
+        self._set("grid_size", size)
+        self._set("mini_grid_size", mini_grid_size)
+        self._set("box_width", size // mini_grid_size)
+        self._set("cell_count", size * size)
+        self._set("full_mask", (1 << size) - 1)
+        cells = range(size * size)
+        self._set("cell_row", tuple(i // size for i in cells))
+        self._set("cell_col", tuple(i % size for i in cells))
+        self._set("cell_box", tuple((i // size // mini_grid_size) * mini_grid_size + (i % size) // self.box_width for i in cells))
+        rows = tuple(tuple(range(row * size, (row + 1) * size)) for row in range(size))
+        cols = tuple(tuple(range(col, size * size, size)) for col in range(size))
+        boxes = tuple(tuple(i for i in cells if self.cell_box[i] == box) for box in range(size))
+        self._set("rows", rows)
+        self._set("cols", cols)
+        self._set("boxes", boxes)
+        self._set("units", rows + cols + boxes)
+        # Unit indexes of each cell: its row, its column and its box
+        self._set("cell_units", tuple((self.cell_row[i], size + self.cell_col[i], 2 * size + self.cell_box[i]) for i in cells))
+        self._set("peers", tuple(tuple(sorted(set(rows[self.cell_row[i]] + cols[self.cell_col[i]] + boxes[self.cell_box[i]]) - {i}))
+                                 for i in cells))
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Geometry tables are shared and read-only")
+
+@lru_cache(maxsize=None)
+def geometry(grid_size, mini_grid_size):
+    # The shared tables for a grid size
+    return Geometry(grid_size, mini_grid_size)
@@ -0,0 +1,136 @@
+from array import array
+import math
+from operator import or_
+from sudoku_generator import SudokuGenerator
+from sudoku_geometry import box_height, geometry
+from sudoku_techniques import FINDERS
+
+# Human techniques from easiest to hardest: (name, score per use, difficulty)
+TECHNIQUES = [("Hidden single", 1, "Easy"),
+              ("Naked single", 2, "Easy"),
+              ("Locked candidates", 4, "Medium"),
+              ("Naked pair", 5, "Medium"),
+              ("Hidden pair", 6, "Medium"),
+              ("Naked triple", 7, "Hard"),
+              ("Hidden triple", 8, "Hard"),
+              ("X-Wing", 10, "Hard"),
+              ("Guess", 20, "Extreme")]  # No technique applies, a cell is taken from the solution
+TECHNIQUE_SCORE = {name: score for name, score, _ in TECHNIQUES}
+TECHNIQUE_DIFFICULTY = {name: difficulty for name, _, difficulty in TECHNIQUES}
+
+class GradeResult:
+    # Outcome of grading one puzzle
+    __slots__ = ("solved", "score", "steps", "techniques", "hardest", "difficulty", "solution")
+
+    def __init__(self):
+        self.solved = False  # False when the puzzle has no solution
+        self.score = 0  # Sum of TECHNIQUE_SCORE over every step
+        self.steps = 0
+        self.techniques = {}  # Technique name -> times used
+        self.hardest = None
+        self.difficulty = None  # Easy / Medium / Hard / Extreme, from the hardest technique
+        self.solution = None
+
+    def __repr__(self):
+        return f"GradeResult(difficulty={self.difficulty!r}, score={self.score}, steps={self.steps}, techniques={self.techniques})"
+
+class SudokuGrader:
+    # Solve with candidate bitmasks the way a person would and record every technique used
+    def __init__(self, grid_size=9, mini_grid_size=3):
+        self.grid_size = grid_size
+        self.mini_grid_size = mini_grid_size
+        self.cell_count = grid_size * grid_size
+        self.full_mask = (1 << grid_size) - 1
+        self.generator = SudokuGenerator(grid_size, mini_grid_size)
+        self.geometry = geometry(grid_size, mini_grid_size)
+        self.units = self.geometry.units
+        self.peers = self.geometry.peers
+
+    def grade(self, puzzle):
+        # Grade a puzzle given as flat numbers (0 = empty)
+        result = GradeResult()
+        self.cells = list(puzzle)
+        self.cand = [0] * self.cell_count
+        cells, cand, cell_units = self.cells, self.cand, self.geometry.cell_units
+        used = [0] * (3 * self.grid_size)  # Numbers already in each unit
+        for i, num in enumerate(cells):
+            if (num):
+                for unit in cell_units[i]:
+                    used[unit] |= 1 << (num - 1)
+        for i, num in enumerate(cells):
+            if (not num):
+                row, col, box = cell_units[i]
+                cand[i] = self.full_mask & ~(used[row] | used[col] | used[box])
+        while 0 in cells:
+            if (not self._is_consistent()):
+                return result
+            for name, finder in FINDERS:
+                # Apply every step the technique finds in one sweep, then go back to the easiest technique
+                steps = 0
+                for deduction in finder(self.geometry, cand):
+                    self._apply(deduction)
+                    steps += 1
+                if (steps):
+                    break
+            else:
+                name, steps = "Guess", self._guess(result)
+                if (not steps):
+                    return result
+            result.steps += steps
+            result.score += steps * TECHNIQUE_SCORE[name]
+            result.techniques[name] = result.techniques.get(name, 0) + steps
+            if (result.hardest is None or TECHNIQUE_SCORE[name] > TECHNIQUE_SCORE[result.hardest]):
+                result.hardest = name
+        if (not self._is_solved()):
+            return result
+        result.solved = True
+        result.solution = array("B", cells)
+        result.difficulty = TECHNIQUE_DIFFICULTY[result.hardest] if result.hardest else "Easy"
+        return result
+
+    def _place(self, i, num):
+        bit = ~(1 << (num - 1))
+        self.cells[i] = num
+        self.cand[i] = 0
+        cand = self.cand
+        for p in self.peers[i]:
+            cand[p] &= bit
+
+    def _is_consistent(self):
+        # Every empty cell still has a candidate
+        return all(map(or_, self.cand, self.cells))
+
+    def _is_solved(self):
+        full = self.full_mask
+        for unit in self.units:
+            seen = 0
+            for i in unit:
+                seen |= 1 << (self.cells[i] - 1)
+            if (seen != full):
+                return False
+        return True
+
+    def _apply(self, deduction):
+        # Write one step to the candidates: a placement, or eliminations
+        if (deduction.cell is not None):
+            self._place(deduction.cell, deduction.number)
+            return
+        cand = self.cand
+        for i, num in deduction.eliminations:
+            cand[i] &= ~(1 << (num - 1))
+
+    def _guess(self, result):
+        # Fill the most constrained cell from the real solution
+        if (result.solution is None):
+            result.solution = next(self.generator.solutions(self.cells, shuffle=False), None)
+            if (result.solution is None):
+                return 0
+        cand = self.cand
+        best = min((i for i in range(self.cell_count) if cand[i]), key=lambda i: cand[i].bit_count())
+        self._place(best, result.solution[best])
+        return 1
+
+def grade_puzzle(puzzle):
+    # Grade a flat puzzle of any supported size
+    grid_size = math.isqrt(len(puzzle))
+    return SudokuGrader(grid_size, box_height(grid_size)).grade(puzzle)
@@ -0,0 +1,266 @@
+from array import array
+import math
+import random
+from sudoku_generator import SudokuGenerator
+from sudoku_geometry import box_height, geometry
+from sudoku_solver import SudokuSolver
+
+GRID_SIZES = {4: 2, 6: 2, 9: 3, 12: 3, 16: 4, 25: 5, 36: 6}  # Grid size -> mini grid size (rows per box, see box_height)
+
+def difficulty_ranges(grid_size):
+    # Number of cells to remove for each difficulty
+    removed_grid_limit = (grid_size ** 2) - 1 
+    easy_mode_range = (int(removed_grid_limit * (25 / 100)), int(removed_grid_limit * (35 / 100) - 1))
+    medium_mode_range = (int(easy_mode_range[1] + 1), int(removed_grid_limit * (45 / 100) - 1))
+    hard_mode_range = (int(medium_mode_range[1] + 1), int(removed_grid_limit * (60 / 100) - 1))
+    extreme_mode_range = (int(hard_mode_range[1] + 1), int(removed_grid_limit * (80 / 100)))
+    random_mode_range = (easy_mode_range[0], extreme_mode_range[1])
+    return [("Easy", easy_mode_range),
+            ("Medium", medium_mode_range),
+            ("Hard", hard_mode_range),
+            ("Extreme", extreme_mode_range),
+            ("Random", random_mode_range)]
+
+def puzzle_board(puzzle, solution=None):
+    # Board for a puzzle given as flat numbers (0 = empty) with its clues locked
+    grid_size = math.isqrt(len(puzzle))
+    board = SudokuBoard(grid_size, box_height(grid_size))
+    board.load_cells(puzzle)
+    board.lock_initial_numbers()
+    if (solution is not None):
+        board.load_answers(solution)
+    return board
+
+class SudokuBoard:
+    # Headless Sudoku state (no tkinter), cells are stored row by row in flat arrays
+    __slots__ = ("grid_size", "mini_grid_size", "cell_count", "cells", "answers", "givens", "editable", "dirty",
+                 "geometry", "cell_units", "unit_counts", "unit_used", "filled_count", "correct_count", "conflict_count")
+
+    def __init__(self, grid_size=9, mini_grid_size=3):
+        self.grid_size = grid_size
+        self.mini_grid_size = mini_grid_size
+        self.cell_count = grid_size * grid_size
+        self.cells = array("B", bytes(self.cell_count))  # Current numbers (0 = empty)
+        self.answers = array("B", bytes(self.cell_count))  # Solved grid
+        self.givens = bytearray(self.cell_count)  # 1 = number placed by the generator
+        self.editable = bytearray(b"\x01" * self.cell_count)  # 1 = player can change the cell
+        self.dirty = set()  # Cells changed since the view was last synced
+        self.geometry = geometry(grid_size, mini_grid_size)  # Shared index tables of this grid size
+        self.cell_units = self.geometry.cell_units
+        # Running counters so a single edit costs O(1):
+        # unit_counts[unit * (grid_size + 1) + num] = how often num appears in a unit (rows, then columns, then boxes)
+        self.unit_counts = [0] * (3 * grid_size * (grid_size + 1))
+        self.unit_used = [0] * (3 * grid_size)  # Bitmask of the numbers present in each unit (bit num - 1)
+        self.filled_count = 0  # Non-empty cells
+        self.correct_count = 0  # Editable cells that match the answer
+        self.conflict_count = 0  # Extra copies of a number inside a row, column or box
+
+    def index(self, row, col):
+        return row * self.grid_size + col
+
+    def get(self, row, col):
+        return self.cells[row * self.grid_size + col]
+
+    def _count(self, i, num, step):
+        # Add (step = 1) or remove (step = -1) num at cell i in the unit counters
+        counts, stride, used, bit = self.unit_counts, self.grid_size + 1, self.unit_used, 1 << (num - 1)
+        for unit in self.cell_units[i]:
+            k = unit * stride + num
+            if (step > 0):
+                counts[k] += 1
+                if (counts[k] > 1):
+                    self.conflict_count += 1
+                else:
+                    used[unit] |= bit
+            else:
+                if (counts[k] > 1):
+                    self.conflict_count -= 1
+                else:
+                    used[unit] &= ~bit
+                counts[k] -= 1
+            if (counts[k] == 2 - (step < 0)):
+                # num went from 1 to 2 copies in this unit or back: the other copy changes conflict state
+                self._mark_unit(unit, num)
+
+    def _mark_unit(self, unit, num):
+        # Mark the cells of a unit holding num for the view
+        cells = self.cells
+        for j in self.geometry.units[unit]:
+            if (cells[j] == num):
+                self.dirty.add(j)
+
+    def is_conflict(self, i):
+        # True when the number in cell i appears again in its row, column or box (no answers needed)
+        num = self.cells[i]
+        if (not num):
+            return False
+        counts, stride = self.unit_counts, self.grid_size + 1
+        return any(counts[unit * stride + num] > 1 for unit in self.cell_units[i])
+
+    def _write(self, i, num):
+        # Change one cell and update every counter in constant time
+        old = self.cells[i]
+        if (old == num):
+            return False
+        if (old):
+            self._count(i, old, -1)
+            self.filled_count -= 1
+        if (num):
+            self._count(i, num, 1)
+            self.filled_count += 1
+        answer = self.answers[i]
+        if (answer and self.editable[i]):
+            self.correct_count += (num == answer) - (old == answer)
+        self.cells[i] = num
+        return True
+
+    def recount(self):
+        # Rebuild every counter from scratch (after bulk changes)
+        size = self.grid_size
+        self.unit_counts = [0] * (3 * size * (size + 1))
+        self.unit_used = [0] * (3 * size)
+        self.filled_count = self.correct_count = self.conflict_count = 0
+        for i, num in enumerate(self.cells):
+            if (num):
+                self._count(i, num, 1)
+                self.filled_count += 1
+                if (self.editable[i] and num == self.answers[i]):
+                    self.correct_count += 1
+
+    def set(self, row, col, num):
+        # Change a cell and remember it for the view, True when the number changed
+        i = row * self.grid_size + col
+        if (self._write(i, num)):
+            self.dirty.add(i)
+            return True
+        return False
+
+    def candidates(self, i):
+        # Numbers not yet used in the row, column or box of cell i, as a bitmask
+        used = self.unit_used
+        row, col, box = self.cell_units[i]
+        return self.geometry.full_mask & ~(used[row] | used[col] | used[box])
+
+    def is_editable(self, row, col):
+        return self.editable[row * self.grid_size + col] == 1
+
+    def lock(self, row, col):
+        # Make a cell read-only
+        i = row * self.grid_size + col
+        if (self.editable[i]):
+            if (self.answers[i] and self.cells[i] == self.answers[i]):
+                self.correct_count -= 1
+            self.editable[i] = 0
+            self.dirty.add(i)
+
+    def take_dirty(self):
+        # Return changed cells and start tracking again
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def clear(self):
+        # Empty every cell and unlock the board
+        for i in range(self.cell_count):
+            if (self.cells[i] or not self.editable[i]):
+                self.dirty.add(i)
+        self.cells = array("B", bytes(self.cell_count))
+        self.answers = array("B", bytes(self.cell_count))
+        self.givens = bytearray(self.cell_count)
+        self.editable = bytearray(b"\x01" * self.cell_count)
+        self.recount()
+
+    def is_empty(self, row, col):
+        return self.cells[row * self.grid_size + col] == 0
+
+    def load_cells(self, values):
+        # Replace every cell value, marking only the ones that changed
+        for i, num in enumerate(values):
+            if (self._write(i, num)):
+                self.dirty.add(i)
+
+    def fill_grid(self, rng=random):
+        # Fill the board with a random complete grid
+        self.load_cells(SudokuGenerator(self.grid_size, self.mini_grid_size, rng).fill_grid())
+        return True
+
+    def store_answers(self):
+        # Save the fully solved grid before removing any numbers
+        self.answers = array("B", self.cells)
+        self.recount()
+
+    def load_answers(self, values):
+        self.answers = array("B", values)
+        self.recount()
+
+    def has_answers(self):
+        # True when answers is a complete valid grid that agrees with every read-only cell
+        size = self.grid_size
+        full = (1 << size) - 1
+        for i in range(self.cell_count):
+            if (not 1 <= self.answers[i] <= size or (not self.editable[i] and self.cells[i] != self.answers[i])):
+                return False
+        seen = [0] * (3 * size)
+        for i, num in enumerate(self.answers):
+            bit = 1 << (num - 1)
+            for unit in self.cell_units[i]:
+                seen[unit] |= bit
+        return all(mask == full for mask in seen)
+
+    def solve_answers(self):
+        # Rebuild missing or corrupt answers by solving the read-only cells, False if they have no solution
+        clues = [num if not editable else 0 for num, editable in zip(self.cells, self.editable)]
+        solution = SudokuSolver(self.grid_size, self.mini_grid_size).solve(clues, limit=1).solution
+        if (solution is None):
+            return False
+        self.load_answers(solution)
+        return True
+
+    def remove_numbers(self, remove_grid_count, rng=random, unique=False):
+        # Remove numbers from a random set of cells then lock the rest, returns how many were removed
+        # (unique carving stops early when no more cells can go without a second solution)
+        if (unique):
+            self.load_cells(SudokuGenerator(self.grid_size, self.mini_grid_size, rng).carve(self.cells, remove_grid_count))
+        else:
+            all_cells = list(range(self.cell_count))
+            rng.shuffle(all_cells)
+            for i in all_cells[:remove_grid_count]:
+                if (self._write(i, 0)):
+                    self.dirty.add(i)
+        self.lock_initial_numbers()
+        return self.cell_count - self.filled_count
+
+    def lock_initial_numbers(self):
+        # Lock the initially filled numbers and update the editable mask
+        for i in range(self.cell_count):
+            filled = 1 if self.cells[i] else 0
+            if (self.editable[i] == filled):
+                self.dirty.add(i)
+            self.givens[i] = filled
+            self.editable[i] = 1 - filled
+        self.recount()
+
+    def reveal(self):
+        # Show the answers and lock every cell
+        for i in range(self.cell_count):
+            if (self.cells[i] != self.answers[i] or self.editable[i]):
+                self._write(i, self.answers[i])
+                self.editable[i] = 0
+                self.dirty.add(i)
+        self.recount()
+
+    def empty_cells(self):
+        return [divmod(i, self.grid_size) for i in range(self.cell_count) if self.cells[i] == 0]
+
+    def count_correct(self):
+        # Editable cells that match the answer
+        return self.correct_count
+
+    def check_win(self):
+        # Full grid with no repeated number in any row, column or box
+        return self.filled_count == self.cell_count and self.conflict_count == 0
+
+    def rows(self, values=None):
+        # Split a flat array into rows
+        values = self.cells if values is None else values
+        size = self.grid_size
+        return [list(values[row * size:(row + 1) * size]) for row in range(size)]
@@ -0,0 +1,68 @@
+import math
+import time
+from sudoku_generator import SudokuGenerator
+from sudoku_geometry import box_height
+
+class SolveResult:
+    # Outcome of solving one board
+    __slots__ = ("solutions", "count", "limit", "elapsed")
+
+    def __init__(self, solutions, limit, elapsed):
+        self.solutions = solutions  # Up to limit solved grids as arrays
+        self.count = len(solutions)  # Number of solutions, counting stops at limit
+        self.limit = limit
+        self.elapsed = elapsed  # Seconds
+
+    @property
+    def solution(self):
+        return self.solutions[0] if self.solutions else None
+
+    @property
+    def is_unique(self):
+        return self.count == 1
+
+    def __repr__(self):
+        count = f"{self.count}+" if self.count >= self.limit > 1 else str(self.count)
+        return f"SolveResult(solutions={count}, elapsed={self.elapsed * 1000:.2f}ms)"
+
+class SudokuSolver:
+    # Solve any partially filled board with the generator's bitmask search (singles propagation + MRV backtracking)
+    def __init__(self, grid_size=9, mini_grid_size=3):
+        self.grid_size = grid_size
+        self.mini_grid_size = mini_grid_size
+        self.generator = SudokuGenerator(grid_size, mini_grid_size)
+
+    def solve(self, cells, limit=2):
+        # Solutions of cells (flat numbers, 0 = empty), counting up to limit
+        started = time.perf_counter()
+        solutions = []
+        for solution in self.generator.solutions(cells, shuffle=False):
+            solutions.append(solution)
+            if (len(solutions) >= limit):
+                break
+        return SolveResult(solutions, limit, time.perf_counter() - started)
+
+    def check(self, cells):
+        # "Check my board": True while the numbers entered so far can still lead to a solution
+        return next(self.generator.solutions(cells, shuffle=False), None) is not None
+
+    def steps(self, cells, solution=None):
+        # Step-by-step solve: yield (index, number) for each empty cell, the most constrained cell first
+        generator = self.generator
+        if (solution is None):
+            solution = self.solve(cells, limit=1).solution
+            if (solution is None):
+                return
+        if (not generator._reset(cells)):
+            return
+        while True:
+            i = generator._pick_cell()
+            if (i is None):
+                return
+            generator._place(i, solution[i])
+            yield i, solution[i]
+
+def solve_board(cells, limit=2):
+    # Solve a flat board of any supported size
+    grid_size = math.isqrt(len(cells))
+    return SudokuSolver(grid_size, box_height(grid_size)).solve(cells, limit)
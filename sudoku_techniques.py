@@ -0,0 +1,169 @@
+from itertools import combinations
+
+# Human solving techniques, shared by the hint engine (first step only) and the grader (every step).
+# A finder takes the grid's geometry and the candidate bitmask of every cell (0 for filled cells)
+# and yields Deductions. The caller may apply each one to cand before asking for the next, the
+# finder then goes on with the updated candidates.
+
+class Deduction:
+    # One logical step: a placement (cell and number) or a list of (cell, number) eliminations
+    __slots__ = ("technique", "cell", "number", "cells", "numbers", "unit", "eliminations")
+
+    def __init__(self, technique, cells, numbers, unit=None, cell=None, number=None, eliminations=()):
+        self.technique = technique
+        self.cell = cell  # Cell to fill, None for elimination steps
+        self.number = number
+        self.cells = list(cells)  # Cells the reasoning is about
+        self.numbers = list(numbers)
+        self.unit = unit  # Unit index (rows, then columns, then boxes) the step happens in
+        self.eliminations = list(eliminations)
+
+    def __repr__(self):
+        return f"Deduction({self.technique!r}, cell={self.cell}, number={self.number}, eliminations={len(self.eliminations)})"
+
+def eliminations(cand, cells, mask):
+    # (cell, number) pairs of mask still possible in cells
+    found = []
+    for i in cells:
+        common = cand[i] & mask
+        while common:
+            bit = common & -common
+            common ^= bit
+            found.append((i, bit.bit_length()))
+    return found
+
+def hidden_singles(geometry, cand):
+    # A number that fits in only one cell of a unit
+    for unit_index, unit in enumerate(geometry.units):
+        once = twice = 0
+        for i in unit:
+            c = cand[i]
+            twice |= once & c
+            once |= c
+        hidden = once & ~twice
+        while hidden:
+            bit = hidden & -hidden
+            hidden ^= bit
+            cell = next((i for i in unit if cand[i] & bit), None)  # None when an applied placement took its cell
+            if (cell is not None):
+                num = bit.bit_length()
+                yield Deduction("Hidden single", unit, [num], unit_index, cell, num)
+
+def naked_singles(geometry, cand):
+    # A cell with one candidate left
+    for i in range(geometry.cell_count):
+        c = cand[i]
+        if (c and c & (c - 1) == 0):
+            yield Deduction("Naked single", [i], [c.bit_length()], cell=i, number=c.bit_length())
+
+def _repeated(cand, cells):
+    # Bitmask of the numbers that are a candidate in at least two of cells
+    once = twice = 0
+    for i in cells:
+        c = cand[i]
+        twice |= once & c
+        once |= c
+    return twice
+
+def locked_candidates(geometry, cand):
+    # Pointing: a number of a box sits on one line. Claiming: a number of a line sits in one box
+    size, units, cell_units = geometry.grid_size, geometry.units, geometry.cell_units
+    for box_index in range(2 * size, 3 * size):
+        box = units[box_index]
+        repeated = _repeated(cand, box)  # Numbers with a single spot are hidden singles, not locked
+        while repeated:
+            bit = repeated & -repeated
+            repeated ^= bit
+            spots = [i for i in box if cand[i] & bit]
+            if (len(spots) < 2):
+                continue  # An applied step removed it
+            for line_index in cell_units[spots[0]][:2]:
+                line = units[line_index]
+                if (all(i in line for i in spots)):
+                    found = eliminations(cand, [i for i in line if i not in box], bit)
+                    if (found):
+                        yield Deduction("Locked candidates", spots, [bit.bit_length()], box_index, eliminations=found)
+    for line_index in range(2 * size):
+        line = units[line_index]
+        repeated = _repeated(cand, line)
+        while repeated:
+            bit = repeated & -repeated
+            repeated ^= bit
+            spots = [i for i in line if cand[i] & bit]
+            if (len(spots) < 2):
+                continue
+            box_index = cell_units[spots[0]][2]
+            box = units[box_index]
+            if (all(i in box for i in spots)):
+                found = eliminations(cand, [i for i in box if i not in line], bit)
+                if (found):
+                    yield Deduction("Locked candidates", spots, [bit.bit_length()], line_index, eliminations=found)
+
+def naked_subsets(geometry, cand, k):
+    # k cells of a unit that share only k candidates
+    name = "Naked pair" if k == 2 else "Naked triple"
+    for unit_index, unit in enumerate(geometry.units):
+        small = [i for i in unit if cand[i] and cand[i].bit_count() <= k]
+        if (len(small) < k):
+            continue
+        for group in combinations(small, k):
+            mask = 0
+            for i in group:
+                mask |= cand[i]
+            if (mask.bit_count() == k):
+                found = eliminations(cand, [i for i in unit if i not in group], mask)
+                if (found):
+                    numbers = [num for num in range(1, geometry.grid_size + 1) if mask >> (num - 1) & 1]
+                    yield Deduction(name, group, numbers, unit_index, eliminations=found)
+
+def hidden_subsets(geometry, cand, k):
+    # k numbers of a unit that only fit in the same k cells
+    name = "Hidden pair" if k == 2 else "Hidden triple"
+    for unit_index, unit in enumerate(geometry.units):
+        places = {}
+        repeated = _repeated(cand, unit)
+        while repeated:
+            bit = repeated & -repeated
+            repeated ^= bit
+            spots = frozenset(i for i in unit if cand[i] & bit)
+            if (len(spots) <= k):
+                places[bit.bit_length()] = spots
+        if (len(places) < k):
+            continue
+        for numbers in combinations(places, k):
+            spots = frozenset().union(*(places[num] for num in numbers))
+            if (len(spots) == k):
+                keep = sum(1 << (num - 1) for num in numbers)
+                found = eliminations(cand, spots, ~keep)
+                if (found):
+                    yield Deduction(name, sorted(spots), numbers, unit_index, eliminations=found)
+
+def x_wings(geometry, cand):
+    # A number that fits in the same two columns of two rows (or the reverse) is gone from the rest of them
+    size, units = geometry.grid_size, geometry.units
+    for base, cross_base, pos in ((0, size, lambda i: i % size), (size, 0, lambda i: i // size)):
+        for num in range(1, size + 1):
+            bit = 1 << (num - 1)
+            pairs = {}
+            for line_index in range(base, base + size):
+                spots = tuple(pos(i) for i in units[line_index] if cand[i] & bit)
+                if (len(spots) == 2):
+                    pairs.setdefault(spots, []).append(line_index)
+            for spots, line_indexes in pairs.items():
+                if (len(line_indexes) >= 2):
+                    first, second = line_indexes[:2]
+                    corners = [i for i in units[first] + units[second] if cand[i] & bit]
+                    others = [i for other in spots for i in units[cross_base + other] if i not in corners]
+                    found = eliminations(cand, others, bit)
+                    if (found):
+                        yield Deduction("X-Wing", corners, [num], first, eliminations=found)
+
+# Finders from easiest to hardest: (technique name, finder)
+FINDERS = [("Hidden single", hidden_singles),
+           ("Naked single", naked_singles),
+           ("Locked candidates", locked_candidates),
+           ("Naked pair", lambda geometry, cand: naked_subsets(geometry, cand, 2)),
+           ("Hidden pair", lambda geometry, cand: hidden_subsets(geometry, cand, 2)),
+           ("Naked triple", lambda geometry, cand: naked_subsets(geometry, cand, 3)),
+           ("Hidden triple", lambda geometry, cand: hidden_subsets(geometry, cand, 3)),
+           ("X-Wing", x_wings)]
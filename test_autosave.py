@@ -0,0 +1,66 @@
+import random
+from autosave import AutosaveJournal, JOURNAL, RECORD
+from test_puzzle_library import played_game, assert_same_game
+
+# Recovery of the autosave snapshot and journal
+
+def test_autosave_recovers_snapshot_and_journal(tmp_path):
+    game = played_game(9, 3)
+    board = game.board
+    journal = AutosaveJournal(str(tmp_path), flush_interval=0.01)
+    journal.start()
+    journal.snapshot(game)
+    rng = random.Random(3)
+    for i in rng.sample([i for i in range(board.cell_count) if board.editable[i]], 20):
+        board.set(i // 9, i % 9, rng.randint(0, 9))
+        journal.record_cell(board, i)
+    board.lock(0, 0)
+    journal.record_cell(board, 0)
+    game.hint_count = 2
+    journal.record_hints(game.hint_count, game.max_hint)
+    journal.close()
+    assert_same_game(AutosaveJournal(str(tmp_path)).recover(), game)
+
+def test_autosave_ignores_torn_records_and_stale_journals(tmp_path):
+    game = played_game(16, 4, hint_count=260, max_hint=300)
+    journal = AutosaveJournal(str(tmp_path), flush_interval=0.01)
+    journal.start()
+    journal.snapshot(game)
+    i = next(i for i in range(game.board.cell_count) if game.board.editable[i] and game.board.cells[i])
+    game.board.set(i // 16, i % 16, 0)
+    journal.record_cell(game.board, i)
+    journal.close()
+    with open(journal.journal_path, "ab") as f:
+        f.write(RECORD.pack(i, 5, 0)[:3])  # Crash in the middle of a write
+    assert_same_game(AutosaveJournal(str(tmp_path)).recover(), game)
+    with open(journal.journal_path, "r+b") as f:
+        f.write(JOURNAL.pack(b"SDJ2", journal.generation + 1))  # Journal of a snapshot that never got written
+    recovered = AutosaveJournal(str(tmp_path)).recover()
+    assert recovered.board.cells[i] != 0 and recovered.hint_count == 260
+
+def test_autosave_discard(tmp_path):
+    journal = AutosaveJournal(str(tmp_path), flush_interval=0.01)
+    journal.start()
+    journal.snapshot(played_game(4, 5))
+    journal.discard()
+    journal.close()
+    assert AutosaveJournal(str(tmp_path)).recover() is None
+
+def test_nothing_is_journaled_after_discard(tmp_path):
+    game = played_game(4, 6)
+    board = game.board
+    journal = AutosaveJournal(str(tmp_path), flush_interval=0.01, compact_every=4)
+    journal.start()
+    journal.snapshot(game)
+    i = next(i for i in range(board.cell_count) if board.editable[i])
+    assert not board.set(i // 4, i % 4, board.cells[i])  # Unchanged cells are not journaled by the game
+    journal.discard()
+    for _ in range(10):
+        journal.record_cell(board, i)
+    journal.record_hints(2, 3)
+    assert journal.records == 0 and not journal.needs_compaction()
+    journal.snapshot(game)
+    journal.record_cell(board, i)
+    journal.close()
+    assert journal.records == 1
+    assert_same_game(AutosaveJournal(str(tmp_path)).recover(), game)
@@ -0,0 +1,61 @@
+import random
+from sudoku_generator import SudokuGenerator
+from sudoku_model import GRID_SIZES, SudokuBoard
+
+# The running counters of SudokuBoard against a full rescan of the grid after random edits
+
+def rescan(board):
+    # Every counter computed from the cells alone, without the unit counts
+    size, units = board.grid_size, board.geometry.units
+    used = [0] * len(units)
+    conflicts = 0
+    for unit_index, unit in enumerate(units):
+        for num in range(1, size + 1):
+            copies = sum(board.cells[i] == num for i in unit)
+            conflicts += max(copies - 1, 0)
+            if (copies):
+                used[unit_index] |= 1 << (num - 1)
+    filled = sum(1 for num in board.cells if num)
+    correct = sum(1 for i, num in enumerate(board.cells) if num and board.editable[i] and num == board.answers[i])
+    conflict_cells = {i for unit in units for i in unit
+                      if board.cells[i] and sum(board.cells[j] == board.cells[i] for j in unit) > 1}
+    return filled, correct, conflicts, used, conflict_cells
+
+def assert_counters(board):
+    filled, correct, conflicts, used, conflict_cells = rescan(board)
+    assert (board.filled_count, board.correct_count, board.conflict_count) == (filled, correct, conflicts)
+    assert board.unit_used == used
+    assert {i for i in range(board.cell_count) if board.is_conflict(i)} == conflict_cells
+    assert board.check_win() == (filled == board.cell_count and conflicts == 0)
+    counts = list(board.unit_counts)
+    board.recount()
+    assert board.unit_counts == counts
+
+def test_counters_follow_random_edits():
+    rng = random.Random(1)
+    for grid_size, mini_grid_size in GRID_SIZES.items():
+        if (grid_size > 16):
+            continue  # The rescan is quadratic in the grid size
+        puzzle, solution = SudokuGenerator(grid_size, mini_grid_size, rng).generate(grid_size * grid_size // 2, unique=False)
+        board = SudokuBoard(grid_size, mini_grid_size)
+        board.load_cells(puzzle)
+        board.load_answers(solution)
+        board.lock_initial_numbers()
+        assert_counters(board)
+        editable = [i for i in range(board.cell_count) if board.editable[i]]
+        for step in range(400):
+            i = rng.choice(editable)
+            if (step % 50 == 49):
+                board.lock(i // grid_size, i % grid_size)
+                editable.remove(i)
+            else:
+                num = solution[i] if rng.random() < 0.5 else rng.randint(0, grid_size)
+                board.set(i // grid_size, i % grid_size, num)
+            if (step % 10 == 0):
+                assert_counters(board)
+        assert_counters(board)
+        board.reveal()
+        assert_counters(board)
+        assert board.check_win()
+        board.clear()
+        assert_counters(board)
@@ -0,0 +1,82 @@
+import random
+from edit_history import EditHistory
+from sudoku_generator import SudokuGenerator
+from sudoku_model import puzzle_board
+
+# Undo, redo and goto against the boards seen while the moves were typed
+
+def new_game(seed):
+    rng = random.Random(seed)
+    puzzle, solution = SudokuGenerator(9, 3, rng).generate(45)
+    board = puzzle_board(puzzle, solution)
+    return rng, board, [i for i in range(board.cell_count) if board.editable[i]]
+
+def type_number(board, history, i, num):
+    # The order the game uses: change the board, then record
+    old = board.cells[i]
+    board.set(i // 9, i % 9, num)
+    history.record(i, old, num)
+
+def play(rng, board, history, editable, moves):
+    # Boards after each recorded change, index = history position
+    boards = [list(board.cells)]
+    for _ in range(moves):
+        i = rng.choice(editable)
+        num = rng.randint(0, 9)
+        if (num != board.cells[i]):
+            type_number(board, history, i, num)
+            boards.append(list(board.cells))
+    return boards
+
+def test_goto_undo_and_redo_match_the_typed_boards():
+    for checkpoint_every in (1, 4, 64):
+        rng, board, editable = new_game(checkpoint_every)
+        history = EditHistory(board, checkpoint_every)
+        boards = play(rng, board, history, editable, 150)
+        assert history.position == len(boards) - 1
+        for position in rng.sample(range(len(boards)), 40) + [0, len(boards) - 1]:
+            history.goto(position)
+            assert list(board.cells) == boards[position]
+            if (history.undo() is not None):
+                assert list(board.cells) == boards[position - 1]
+                history.redo()
+            assert list(board.cells) == boards[position]
+            board.recount()
+            assert board.filled_count == sum(1 for num in boards[position] if num)
+        history.goto(len(boards) - 1)
+        while history.undo() is not None:
+            assert list(board.cells) == boards[history.position]
+        assert not history.can_undo() and history.can_redo()
+        while history.redo() is not None:
+            assert list(board.cells) == boards[history.position]
+
+def test_new_change_drops_the_redo_tail():
+    rng, board, editable = new_game(5)
+    history = EditHistory(board, 4)
+    boards = play(rng, board, history, editable, 30)
+    history.goto(10)
+    i = next(i for i in editable if board.cells[i] != 1)
+    type_number(board, history, i, 1)
+    assert history.position == len(history.deltas) == 11 and not history.can_redo()
+    history.undo()
+    assert list(board.cells) == boards[10]
+    history.goto(0)
+    history.goto(11)
+    assert board.cells[i] == 1
+
+def test_hint_locked_cell_keeps_its_number():
+    rng, board, editable = new_game(6)
+    history = EditHistory(board, 4)
+    hint = editable[0]
+    answer = board.answers[hint]
+    type_number(board, history, hint, answer % 9 + 1)  # A wrong number first
+    boards = play(rng, board, history, [i for i in editable if i != hint], 20)
+    board.set(hint // 9, hint % 9, answer)
+    board.lock(hint // 9, hint % 9)
+    while history.undo() is not None:
+        assert board.cells[hint] == answer
+    for position in (0, 7, 1, len(boards), 3):
+        history.goto(position)
+        assert board.cells[hint] == answer
+        expected = boards[max(position - 1, 0)]  # boards starts after the wrong number
+        assert all(board.cells[i] == expected[i] for i in range(board.cell_count) if i != hint)
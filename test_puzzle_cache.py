@@ -0,0 +1,74 @@
+import random
+from puzzle_cache import CanonicalCache, canonical_form, canonical_key
+from sudoku_generator import SudokuGenerator
+from sudoku_geometry import box_height
+
+# Canonical keys are the same for every symmetric copy of a puzzle, and cached solutions map back to each copy
+
+SIZES = (4, 6, 9, 16)
+
+def random_symmetry(size, rng):
+    # A function that moves a grid by a random relabel, band/stack and row/column order, and transpose
+    height = box_height(size)
+    width = size // height
+    def lines(block_size):
+        blocks = list(range(size // block_size))
+        rng.shuffle(blocks)
+        order = []
+        for block in blocks:
+            within = list(range(block * block_size, (block + 1) * block_size))
+            rng.shuffle(within)
+            order.extend(within)
+        return order
+    rows, cols = lines(height), lines(width)
+    labels = [0] + rng.sample(range(1, size + 1), size)
+    transposed = height == width and rng.random() < 0.5
+    def move(cells):
+        moved = [labels[cells[row * size + col]] for row in rows for col in cols]
+        if (transposed):
+            moved = [moved[col * size + row] for row in range(size) for col in range(size)]
+        return moved
+    return move
+
+def puzzles(size, count, seed):
+    rng = random.Random(seed)
+    generator = SudokuGenerator(size, box_height(size), rng)
+    for _ in range(count):
+        yield generator.generate(size * size // 2) + (rng,)
+
+def test_symmetric_copies_share_one_key():
+    for size in SIZES:
+        for puzzle, solution, rng in puzzles(size, 5, size):
+            key = canonical_key(puzzle)
+            for _ in range(5):
+                move = random_symmetry(size, rng)
+                copy = move(puzzle)
+                form = canonical_form(copy)
+                assert form.key == key
+                assert list(form.invert(form.key)) == copy
+                assert list(form.invert(form.apply(move(solution)))) == move(solution)
+
+def test_cached_solution_is_mapped_back_to_each_copy(tmp_path):
+    path = str(tmp_path / "cache.txt")
+    for size in SIZES:
+        with CanonicalCache(path) as cache:
+            for puzzle, solution, rng in puzzles(size, 3, size + 1):
+                assert cache.add(puzzle, solution)
+                for _ in range(3):
+                    move = random_symmetry(size, rng)
+                    copy = move(puzzle)
+                    assert not cache.add(copy) and copy in cache
+                    assert list(cache.solve(copy)) == move(solution)
+    with CanonicalCache(path) as cache:
+        assert len(cache) == 3 * len(SIZES)
+        for puzzle, solution, rng in puzzles(9, 3, 10):
+            move = random_symmetry(9, rng)
+            assert list(cache.solve(move(puzzle))) == move(solution)
+
+def test_grade_is_shared_by_copies():
+    cache = CanonicalCache(None)
+    for puzzle, solution, rng in puzzles(9, 3, 11):
+        difficulty = cache.grade(puzzle)
+        assert difficulty is not None
+        assert cache.grade(random_symmetry(9, rng)(puzzle)) == difficulty
+        assert list(cache.solve(puzzle)) == list(solution)
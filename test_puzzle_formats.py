@@ -0,0 +1,75 @@
+from array import array
+import io
+import random
+from puzzle_formats import format_line, parse_line, read_puzzles, write_puzzles
+from sudoku_model import GRID_SIZES
+
+# Round trips of the puzzle-per-line and .sdk formats, plain and gzip
+
+def pack(grid_size, count=4):
+    # Pattern grids with random numbers and holes, the formats do not care how the grids were made
+    rng = random.Random(grid_size)
+    height = GRID_SIZES[grid_size]
+    width = grid_size // height
+    puzzles = []
+    for _ in range(count):
+        labels = rng.sample(range(1, grid_size + 1), grid_size)
+        solution = array("B", (labels[(width * (row % height) + row // height + col) % grid_size]
+                               for row in range(grid_size) for col in range(grid_size)))
+        puzzle = array("B", (0 if rng.random() < 0.5 else num for num in solution))
+        puzzles.append((puzzle, solution))
+    return puzzles
+
+def as_lists(puzzles):
+    return [(list(puzzle), None if solution is None else list(solution)) for puzzle, solution in puzzles]
+
+def test_line_files_round_trip(tmp_path):
+    for grid_size in GRID_SIZES:
+        puzzles = pack(grid_size)
+        for name in ("pack.txt", "pack.sdm", "pack.txt.gz"):
+            path = str(tmp_path / f"{grid_size}_{name}")
+            assert write_puzzles(path, iter(puzzles)) == len(puzzles)
+            assert as_lists(read_puzzles(path)) == as_lists(puzzles)
+            write_puzzles(path, puzzles, with_solution=False)
+            assert as_lists(read_puzzles(path)) == [(list(puzzle), None) for puzzle, _ in puzzles]
+
+def test_sdk_files_round_trip(tmp_path):
+    for grid_size in GRID_SIZES:
+        puzzles = pack(grid_size)
+        for name in ("pack.sdk", "pack.sdk.gz"):
+            path = str(tmp_path / f"{grid_size}_{name}")
+            write_puzzles(path, puzzles)
+            assert as_lists(read_puzzles(path)) == [(list(puzzle), None) for puzzle, _ in puzzles]
+
+def test_sdk_comments_titles_and_separators(tmp_path):
+    puzzle = "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......"
+    rows = [puzzle[row:row + 9] for row in range(0, 81, 9)]
+    boxed = [f"{row[:3]}|{row[3:6]}|{row[6:]}" for row in rows]
+    spaced = [" ".join(row[:3]) + " | " + " ".join(row[3:6]) + " | " + " ".join(row[6:]) for row in rows]
+    text = ("#A comment\n[Puzzle]\n" + "\n".join(rows) + "\n\n"
+            + "\n".join(boxed[0:3] + ["---+---+---"] + boxed[3:6] + ["===+===+==="] + boxed[6:9]) + "\n\n"
+            + "\n".join(spaced[0:3] + ["------+-------+------"] + spaced[3:6] + [" - - - + - - - + - - -"] + spaced[6:9]) + "\n")
+    path = tmp_path / "grids.sdk"
+    path.write_text(text)
+    grids = list(read_puzzles(str(path)))
+    assert [list(grid) for grid, _ in grids] == [list(parse_line(puzzle))] * 3
+    assert sum(1 for num in grids[2][0] if num) == 17
+
+def test_line_fields_comments_and_bad_lines():
+    text = ("# header\n"
+            "name,puzzle\n"
+            "1.3.2.4.....4.2.;1234341221434321\n"
+            "12.4\t.....1234\n"
+            "1.3.2.4.....4.2. 1234341221434321 rating 3\n"
+            "1.3.2.4.....4.2.,99\n"
+            "g.........1\n")
+    found = list(read_puzzles(io.StringIO(text)))
+    assert [format_line(puzzle) for puzzle, _ in found] == ["1.3.2.4.....4.2.", "1.3.2.4.....4.2.", "1.3.2.4.....4.2."]
+    assert [solution is not None for _, solution in found] == [True, True, False]
+
+def test_large_grid_symbols():
+    cells = list(range(1, 37)) * 36
+    line = format_line(cells)
+    assert line[:36] == "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ@"
+    assert list(parse_line(line)) == cells and list(parse_line(line.lower())) == cells
+    assert parse_line("5" * 16) is None and parse_line("1" * 15) is None
@@ -0,0 +1,53 @@
+import random
+from puzzle_library import SavedGame, PuzzleLibrary, PuzzleLibraryWriter, save_game_file, load_game_file
+from sudoku_generator import SudokuGenerator
+from sudoku_model import GRID_SIZES, puzzle_board
+
+# Round trips of the .dat text saves and the .sdb binary saves
+
+def played_game(grid_size, seed, hint_count=1, max_hint=3):
+    # A generated game with some numbers typed in (a few of them wrong) and a locked hint
+    rng = random.Random(seed)
+    puzzle, solution = SudokuGenerator(grid_size, GRID_SIZES[grid_size], rng).generate(grid_size * grid_size // 2, unique=False)
+    board = puzzle_board(puzzle, solution)
+    empty = [i for i in range(board.cell_count) if not board.cells[i]]
+    for i in rng.sample(empty, len(empty) // 2):
+        board.set(i // grid_size, i % grid_size, solution[i] if rng.random() < 0.8 else rng.randint(1, grid_size))
+    board.set(empty[0] // grid_size, empty[0] % grid_size, solution[empty[0]])
+    board.lock(empty[0] // grid_size, empty[0] % grid_size)
+    board.take_dirty()
+    return SavedGame(board, hint_count, max_hint, len(empty))
+
+def assert_same_game(loaded, game):
+    board, expected = loaded.board, game.board
+    assert (board.grid_size, board.mini_grid_size) == (expected.grid_size, expected.mini_grid_size)
+    assert list(board.cells) == list(expected.cells)
+    assert list(board.answers) == list(expected.answers)
+    assert list(board.editable) == list(expected.editable)
+    assert (loaded.hint_count, loaded.max_hint, loaded.num_to_remove) == (game.hint_count, game.max_hint, game.num_to_remove)
+    assert (board.filled_count, board.correct_count, board.conflict_count) == (expected.filled_count, expected.correct_count, expected.conflict_count)
+
+def test_save_files_round_trip(tmp_path):
+    for grid_size in GRID_SIZES:
+        game = played_game(grid_size, grid_size)
+        for extension in (".dat", ".sdb"):
+            path = str(tmp_path / f"game_{grid_size}{extension}")
+            save_game_file(path, game)
+            assert_same_game(load_game_file(path), game)
+
+def test_binary_save_keeps_hint_counts_above_255(tmp_path):
+    game = played_game(25, 1, hint_count=300, max_hint=400)
+    path = str(tmp_path / "game.sdb")
+    save_game_file(path, game)
+    assert_same_game(load_game_file(path), game)
+
+def test_library_records(tmp_path):
+    games = [played_game(9, seed) for seed in range(5)]
+    path = str(tmp_path / "pack.sdb")
+    with PuzzleLibraryWriter(path, 9, 3) as writer:
+        for game in games:
+            writer.write(game)
+    with PuzzleLibrary(path) as library:
+        assert len(library) == len(games)
+        for index in (0, 3, -1):
+            assert_same_game(library[index], games[index])
@@ -0,0 +1,30 @@
+import random
+import time
+from puzzle_pool import PuzzlePool
+
+# The ready-puzzle pool on disk
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_taken_puzzle_is_not_served_after_a_crash(tmp_path):
+    pool = PuzzlePool(str(tmp_path), high_water=3, rng=random.Random(1))
+    pool.want(16, "Hard")
+    pool.start()
+    wait_for(lambda: pool.size(16, "Hard") == 3)
+    pool.close()
+    pool = PuzzlePool(str(tmp_path), high_water=150, rng=random.Random(2))  # The refill stays busy
+    assert pool.size(16, "Hard") == 3
+    pool.start()
+    puzzle, _ = pool.take(16, "Hard")
+    # No close(): the process dies here, the file must already be without the taken puzzle
+    wait_for(lambda: all(list(puzzle) != list(left) for _, left, _ in PuzzlePool(str(tmp_path)).pools[(16, "Hard")]), 1)
+    pool.close()
+
+def test_large_grids_are_not_pooled(tmp_path):
+    pool = PuzzlePool(str(tmp_path), max_grid_size=16)
+    pool.want(25, "Easy")
+    assert pool.take(25, "Easy") is None and not pool.wanted
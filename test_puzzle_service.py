@@ -0,0 +1,123 @@
+import asyncio
+import json
+from puzzle_formats import parse_line
+from puzzle_service import PuzzleService
+
+# The HTTP service on an ephemeral local port, driven over keep-alive connections
+
+class Client:
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, target, body=None):
+        # (status, decoded JSON) of one request, reconnecting when the server closed the connection
+        if (self.writer is None):
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        data = b"" if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+        self.writer.write(f"{method} {target} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if (line == b"\r\n"):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        response = json.loads(await self.reader.readexactly(int(headers["content-length"])))
+        if (headers["connection"] == "close"):
+            self.close()
+        return status, response
+
+    def close(self):
+        if (self.writer is not None):
+            self.writer.close()
+            self.writer = None
+
+def run_service(test):
+    # Start the service on port 0, run test(service, port) and shut everything down
+    async def main():
+        service = PuzzleService(workers=2, cache_size=64)
+        await service.start()
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        try:
+            async with server:
+                await test(service, server.sockets[0].getsockname()[1])
+        finally:
+            service.close()
+    asyncio.run(main())
+
+def test_routing_and_malformed_input():
+    async def test(service, port):
+        client = Client(port)
+        status, health = await client.request("GET", "/health")
+        assert status == 200 and health["ok"]
+        assert (await client.request("GET", "/nowhere"))[0] == 404
+        assert (await client.request("DELETE", "/solve"))[0] == 405
+        bad = [("POST", "/solve", b"{not json"),
+               ("POST", "/solve", [1, 2, 3]),
+               ("POST", "/solve", {"puzzle": "12x4"}),
+               ("POST", "/solve", {"puzzle": [5] * 16}),
+               ("POST", "/solve", {}),
+               ("GET", "/generate?size=5", None),
+               ("POST", "/generate", {"difficulty": "Impossible"}),
+               ("POST", "/validate", {"board": "1" * 16, "puzzle": "1" * 81}),
+               ("POST", "/hint", {"board": "." * 16, "puzzle": "." * 81})]
+        for method, target, body in bad:
+            status, response = await client.request(method, target, body)
+            assert status == 400 and response["error"], (target, body)
+        status, response = await client.request("POST", "/solve", b"x" * ((1 << 20) + 1))
+        assert status == 413 and client.writer is None  # The connection is closed after it
+        status, response = await client.request("GET", "/generate?size=4&difficulty=Easy&seed=3")
+        assert status == 200 and response["seed"] == 3 and len(response["puzzle"]) == 16
+        assert (await client.request("GET", "/health"))[1]["errors"] == 12
+        client.close()
+    run_service(test)
+
+def test_identical_requests_share_one_job():
+    async def test(service, port):
+        clients = [Client(port) for _ in range(4)]
+        for client in clients:
+            await client.request("GET", "/health")  # Connected before the race, so all four arrive while the job runs
+        body = {"size": 16, "difficulty": "Hard", "seed": 11}
+        answers = await asyncio.gather(*(client.request("POST", "/generate", body) for client in clients))
+        assert all(answer == answers[0] for answer in answers) and answers[0][0] == 200
+        assert service.counters["jobs"] == 1 and service.counters["coalesced"] == 3
+        assert await clients[0].request("POST", "/generate", body) == answers[0]
+        assert service.counters["jobs"] == 1 and service.counters["cache_hits"] == 1
+        unseeded = [(await clients[0].request("POST", "/generate", {"size": 4}))[1]["seed"] for _ in range(2)]
+        assert service.counters["jobs"] == 3 and unseeded[0] != unseeded[1]
+        puzzle = answers[0][1]["puzzle"]
+        solved = [await client.request("POST", "/solve", {"puzzle": puzzle}) for client in clients[:2]]
+        assert solved[0] == solved[1] and solved[0][1]["solution"] == answers[0][1]["solution"] and solved[0][1]["unique"]
+        assert service.counters["jobs"] == 4
+        for client in clients:
+            client.close()
+    run_service(test)
+
+def test_hint_grade_and_validate():
+    async def test(service, port):
+        client = Client(port)
+        generated = (await client.request("POST", "/generate", {"size": 9, "difficulty": "Medium", "seed": 5}))[1]
+        puzzle, solution = parse_line(generated["puzzle"]), parse_line(generated["solution"])
+        status, hint = await client.request("POST", "/hint", {"board": generated["puzzle"]})
+        assert status == 200 and hint["number"] == solution[hint["cell"]] and hint["explanation"]
+        assert hint["row"] * 9 + hint["col"] == hint["cell"]
+        board = list(puzzle)
+        empty = [i for i in range(81) if not board[i]]
+        board[empty[0]] = solution[empty[0]] % 9 + 1
+        status, hint = await client.request("POST", "/hint", {"board": board, "puzzle": generated["puzzle"]})
+        assert hint["wrong"] == [empty[0]]
+        status, hint = await client.request("POST", "/hint", {"board": generated["solution"], "puzzle": list(puzzle)})
+        assert hint["solved"]
+        status, hint = await client.request("POST", "/hint", {"board": "11" + "." * 79})
+        assert status == 200 and not hint["solvable"]
+        status, graded = await client.request("POST", "/grade", {"puzzle": generated["puzzle"]})
+        assert graded["solved"] and graded["solution"] == generated["solution"] and graded["difficulty"]
+        status, checked = await client.request("POST", "/validate", {"board": generated["solution"], "puzzle": generated["puzzle"]})
+        assert checked == {"complete": True, "valid": True, "conflicts": [], "givens_kept": True}
+        status, checked = await client.request("GET", f"/validate?board={'11' + generated['puzzle'][2:]}")
+        assert not checked["complete"] and checked["conflicts"][:2] == [0, 1]
+        client.close()
+    run_service(test)
@@ -0,0 +1,42 @@
+import random
+from puzzle_library import save_game_file, load_game_file
+from sudoku_generator import SudokuGenerator
+from sudoku_model import GRID_SIZES
+from sudoku_solver import SudokuSolver, solve_board
+from test_puzzle_library import played_game
+
+# Solver API, "check my board", step-by-step solve and answers rebuilt for saves without them
+
+def test_solve_check_and_steps():
+    rng = random.Random(7)
+    for grid_size, mini_grid_size in GRID_SIZES.items():
+        if (grid_size > 16):
+            continue
+        puzzle, solution = SudokuGenerator(grid_size, mini_grid_size, rng).generate(grid_size * grid_size // 3)
+        result = solve_board(puzzle)
+        assert result.is_unique and list(result.solution) == list(solution)
+        solver = SudokuSolver(grid_size, mini_grid_size)
+        cells = list(puzzle)
+        empty = [i for i in range(len(cells)) if not cells[i]]
+        for i, num in solver.steps(puzzle):
+            assert not cells[i] and num == solution[i]
+            cells[i] = num
+        assert cells == list(solution)
+        assert solver.check(puzzle)
+        wrong = list(puzzle)
+        wrong[empty[0]] = solution[empty[0]] % grid_size + 1
+        assert not solver.check(wrong) and solver.solve(wrong).count == 0
+
+def test_solve_counts_up_to_limit():
+    assert solve_board([0] * 81).count == 2
+    assert solve_board([0] * 16, limit=5).count == 5
+
+def test_text_save_without_answers_is_solved_again(tmp_path):
+    game = played_game(9, 2)
+    path = tmp_path / "game.dat"
+    save_game_file(str(path), game)
+    text = path.read_text()
+    path.write_text(text[:text.index("Answer")] + text[text.index("Hints"):])
+    board = load_game_file(str(path)).board
+    assert not board.has_answers()
+    assert board.solve_answers() and board.has_answers()
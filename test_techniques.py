@@ -0,0 +1,58 @@
+import random
+from hint_engine import HintEngine
+from sudoku_generator import SudokuGenerator
+from sudoku_grader import SudokuGrader
+from sudoku_model import GRID_SIZES, difficulty_ranges, puzzle_board
+
+# Every placement and elimination of the solving techniques must agree with the puzzle's only solution
+
+def puzzles(grid_size, count, seed, difficulty="Extreme"):
+    rng = random.Random(seed)
+    generator = SudokuGenerator(grid_size, GRID_SIZES[grid_size], rng)
+    remove_range = dict(difficulty_ranges(grid_size))[difficulty]
+    for _ in range(count):
+        yield generator.generate(rng.randint(*remove_range))
+
+class CheckedGrader(SudokuGrader):
+    # Grader that checks each deduction against the solution before applying it
+    def __init__(self, grid_size, solution):
+        super().__init__(grid_size, GRID_SIZES[grid_size])
+        self.solution = solution
+        self.used = {}
+
+    def _apply(self, deduction):
+        if (deduction.cell is not None):
+            assert deduction.number == self.solution[deduction.cell], deduction
+            assert self.cand[deduction.cell] >> (deduction.number - 1) & 1
+        for i, num in deduction.eliminations:
+            assert num != self.solution[i], deduction
+        self.used[deduction.technique] = self.used.get(deduction.technique, 0) + 1
+        super()._apply(deduction)
+
+def test_grader_deductions_match_the_solution():
+    used = {}
+    for grid_size, count in ((6, 10), (9, 60), (12, 3), (16, 2)):
+        for puzzle, solution in puzzles(grid_size, count, grid_size):
+            grader = CheckedGrader(grid_size, solution)
+            result = grader.grade(puzzle)
+            assert result.solved and list(result.solution) == list(solution)
+            for technique, steps in grader.used.items():
+                used[technique] = used.get(technique, 0) + steps
+    assert {"Hidden single", "Naked single", "Locked candidates", "Naked pair", "Hidden pair"} <= set(used)
+
+def test_hints_match_the_answers():
+    for grid_size, count in ((6, 5), (9, 20), (16, 1)):
+        for puzzle, solution in puzzles(grid_size, count, grid_size + 1):
+            board = puzzle_board(puzzle, solution)
+            engine = HintEngine(board)
+            while 0 in board.cells:
+                deduction, steps = engine.next_placement()
+                for step in steps:
+                    assert all(num != solution[i] for i, num in step.eliminations)
+                    assert engine.explain(step)
+                if (deduction is None):
+                    break  # Only guessing is left
+                assert deduction.number == solution[deduction.cell]
+                assert engine.explain(deduction)
+                board.set(deduction.cell // grid_size, deduction.cell % grid_size, deduction.number)
+            assert all(not num or num == solution[i] for i, num in enumerate(board.cells))